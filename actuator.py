@@ -0,0 +1,86 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class UIActuator:
+    """Runs every UI-touching command on one dedicated worker thread.
+
+    Only the worker moves the mouse or takes screenshots, so commands can
+    never interleave on screen. Queueing a command never blocks; the work
+    happens later, in order.
+    """
+
+    def __init__(self, cancel_event=None):
+        # Set to ask the running command to abort at its next sleep or poll
+        self.cancel_event = cancel_event or threading.Event()
+        self._queue = queue.Queue()
+        self._current = None
+        # Bumped by preempt(); commands queued before it are dropped, even one
+        # the worker has already taken off the queue but not started yet
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread"""
+        self._thread = threading.Thread(
+            target=self._worker, name="ui-actuator", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def busy(self):
+        """Whether a command is running or waiting to run"""
+        return self._queue.unfinished_tasks > 0
+
+    @property
+    def current(self):
+        """Name of the command currently running, or None"""
+        return self._current
+
+    def enqueue(self, name, func, *args, **kwargs):
+        """Queue a command to run after the ones already queued"""
+        with self._lock:
+            self._queue.put((self._generation, name, func, args, kwargs))
+
+    def preempt(self):
+        """Cancel the running command and drop anything still queued"""
+        with self._lock:
+            while True:
+                try:
+                    _, name, _, _, _ = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+                logger.info(f"Dropped queued command: {name}")
+            self._generation += 1
+            if self._current is None:
+                return False
+            self.cancel_event.set()
+            logger.info(f"Preempting command: {self._current}")
+            return True
+
+    def _worker(self):
+        while True:
+            generation, name, func, args, kwargs = self._queue.get()
+            with self._lock:
+                if generation != self._generation:
+                    # Preempted between leaving the queue and starting
+                    self._queue.task_done()
+                    logger.info(f"Dropped queued command: {name}")
+                    continue
+                # A stop only applies to the command it preempted; clearing it
+                # under the lock means it cannot wipe out a later preempt()
+                self.cancel_event.clear()
+                self._current = name
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Command '{name}' failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._current = None
+                    self._queue.task_done()
@@ -0,0 +1,90 @@
+"""Compare batch evaluation with scoring one frame at a time.
+
+Builds a synthetic recorded sequence (templates pasted onto a noisy
+background at random positions, with runs of identical frames like a long
+wait produces) and scores every template against every frame twice:
+with Matcher.score per frame, and with workflows.batch_eval. Checks that
+both give the same scores and reports the time each takes.
+
+    python benchmarks/bench_batch_eval.py
+    python benchmarks/bench_batch_eval.py --frames 2000 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from workflows.batch_eval import FrameSequence, evaluate  # noqa: E402
+from workflows.display_scale import DisplayScale  # noqa: E402
+from workflows.matcher import Frame, Matcher  # noqa: E402
+from workflows.template_bundle import template_names  # noqa: E402
+
+
+def make_frames(matcher, names, count, repeat, size, seed=0):
+    rng = np.random.default_rng(seed)
+    height, width = size
+    frames = []
+    while len(frames) < count:
+        image = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+        template = matcher.template(names[rng.integers(len(names))])
+        h, w = template.shape[:2]
+        if h < height and w < width:
+            y, x = rng.integers(height - h), rng.integers(width - w)
+            image[y : y + h, x : x + w] = template
+        frames.extend([image] * repeat)
+    return frames[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument(
+        "--repeat", type=int, default=4, help="Identical frames in a row"
+    )
+    parser.add_argument("--height", type=int, default=400)
+    parser.add_argument("--width", type=int, default=640)
+    args = parser.parse_args()
+
+    images = os.path.join(ROOT, "images")
+    scale = DisplayScale(capture=1.0, ui=1.0)
+    matcher = Matcher(images, scale)
+    names = template_names(images)
+    frames = make_frames(
+        matcher, names, args.frames, args.repeat, (args.height, args.width)
+    )
+    print(f"{len(frames)} frames of {args.width}x{args.height}, {len(names)} templates")
+
+    started = time.perf_counter()
+    single = {
+        name: np.array([matcher.score(name, Frame(image))[0] for image in frames])
+        for name in names
+    }
+    single_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    sequence = FrameSequence()
+    recorded = [
+        sequence.add(image, "synthetic", str(index), index, scale)
+        for index, image in enumerate(frames)
+    ]
+    scores = evaluate(sequence, lambda _: matcher, names)
+    uids = np.array([frame.uid for frame in recorded])
+    batch_time = time.perf_counter() - started
+
+    difference = max(np.abs(scores[name][uids] - single[name]).max() for name in names)
+    print(f"per frame: {single_time:6.2f}s")
+    print(
+        f"batched:   {batch_time:6.2f}s ({sequence.unique_count} unique frames, "
+        f"{single_time / batch_time:.1f}x faster)"
+    )
+    print(f"max score difference: {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Compare command and status latency with the embedded vs. an external broker.
+
+Starts the service twice on this machine:
+- embedded: `main.py --start-broker` (broker and client on one event loop)
+- external: `main.py` connected to a broker in a separate process, by default
+  `main.py --broker-only`; pass --external HOST:PORT to use e.g. mosquitto
+
+and measures request/response round trips of the `status` command (the
+current state) and the `stop` command (an acknowledgement) through each.
+The service answers without touching the UI, so no display is needed.
+
+    python benchmarks/bench_broker_latency.py
+    python benchmarks/bench_broker_latency.py --external localhost:1883 --count 500
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from amqtt.client import MQTTClient  # noqa: E402
+from amqtt.mqtt.constants import QOS_1  # noqa: E402
+
+from mqtt_test_client import request  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(*args, data_dir):
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "main.py"), *args, "--data-dir", data_dir],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def measure(host, port, count):
+    """Round trips in seconds per command, after the service has answered once"""
+    args = argparse.Namespace(topic_prefix="uv_studio", timeout=5.0)
+    client = MQTTClient(config={"auto_reconnect": False})
+    for _ in range(50):
+        try:
+            await client.connect(f"mqtt://{host}:{port}")
+            break
+        except Exception:
+            await asyncio.sleep(0.2)
+    reply_topic = f"uv_studio/reply/{uuid.uuid4().hex[:12]}"
+    await client.subscribe([(reply_topic, QOS_1)])
+
+    # Wait until the service is connected and answering
+    deadline = time.monotonic() + 15
+    while (await request(client, args, reply_topic, "status"))[0] is None:
+        if time.monotonic() > deadline:
+            raise RuntimeError("The service did not answer")
+
+    results = {}
+    for command in ("status", "stop"):
+        latencies = []
+        for _ in range(count):
+            reply, elapsed = await request(client, args, reply_topic, command)
+            if reply is not None:
+                latencies.append(elapsed)
+        results[command] = latencies
+    await client.disconnect()
+    return results
+
+
+def report(name, results):
+    for command, latencies in results.items():
+        latencies = sorted(latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(
+            f"{name:<10} {command:<7} {len(latencies):>5} "
+            f"{statistics.median(latencies) * 1000:>9.2f} {p95 * 1000:>9.2f} "
+            f"{latencies[-1] * 1000:>9.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument(
+        "--external", help="HOST:PORT of an already running broker to compare against"
+    )
+    args = parser.parse_args()
+    # Connection attempts while the service starts up are expected to fail
+    logging.getLogger("amqtt").setLevel(logging.CRITICAL)
+
+    data_dir = tempfile.mkdtemp()
+    print(
+        f"{'broker':<10} {'command':<7} {'n':>5} {'median ms':>9} {'p95 ms':>9} {'max ms':>9}"
+    )
+
+    port = free_port()
+    service = start("--start-broker", "--broker-port", str(port), data_dir=data_dir)
+    try:
+        report("embedded", asyncio.run(measure("localhost", port, args.count)))
+    finally:
+        service.terminate()
+        service.wait()
+
+    broker = None
+    if args.external:
+        host, port = args.external.rsplit(":", 1)
+    else:
+        host, port = "localhost", str(free_port())
+        broker = start("--broker-only", "--broker-port", port, data_dir=data_dir)
+    service = start("--broker-host", host, "--broker-port", port, data_dir=data_dir)
+    try:
+        report("external", asyncio.run(measure(host, int(port), args.count)))
+    finally:
+        service.terminate()
+        service.wait()
+        if broker:
+            broker.terminate()
+            broker.wait()
+
+
+if __name__ == "__main__":
+    main()
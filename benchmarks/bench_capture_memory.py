@@ -0,0 +1,118 @@
+"""Measure the memory a capture-and-match poll allocates, with and without reusable buffers.
+
+Replaces the screenshot with a fixed full-screen image (retina size by
+default) and runs the poll a wait loop makes: grab the window region,
+then match templates in every mode against it. For Matcher with and
+without its FramePool, reports per poll the peak memory above the
+baseline while capturing and over the whole poll (which includes
+OpenCV's score maps), the memory still held afterwards (steady state)
+and the time taken, and checks that both find the same matches.
+
+    python benchmarks/bench_capture_memory.py
+    python benchmarks/bench_capture_memory.py --width 1920 --height 1080 --polls 50
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from workflows import matcher as matcher_module  # noqa: E402
+from workflows.display_scale import DisplayScale  # noqa: E402
+from workflows.matcher import MODES, Matcher  # noqa: E402
+from workflows.template_bundle import template_names  # noqa: E402
+
+
+def make_screen(matcher, names, size, seed=0):
+    """A noisy RGBA screen with the templates pasted on it, like a screenshot"""
+    rng = np.random.default_rng(seed)
+    height, width = size
+    screen = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    for name in names:
+        template = matcher.template(name)
+        h, w = template.shape[:2]
+        y, x = rng.integers(height - h), rng.integers(width - w)
+        screen[y : y + h, x : x + w] = template
+    rgba = np.dstack([screen[:, :, ::-1], np.full((height, width), 255, np.uint8)])
+    return Image.fromarray(rgba, "RGBA")
+
+
+def measure(matcher, names, region, polls):
+    """Matches of the last poll and per poll: capture peak, poll peak, retained, seconds"""
+    # The first poll allocates the pool's buffers and the templates
+    matcher.locate_all(names, frame=matcher.grab(region))
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    capture_peaks, poll_peaks, retained = [], [], []
+    started = time.perf_counter()
+    for _ in range(polls):
+        tracemalloc.reset_peak()
+        frame = matcher.grab(region)
+        capture_peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        matches = matcher.locate_all(names, frame=frame)
+        del frame
+        current, peak = tracemalloc.get_traced_memory()
+        poll_peaks.append(peak - baseline)
+        retained.append(current - baseline)
+    seconds = (time.perf_counter() - started) / polls
+    tracemalloc.stop()
+    return matches, max(capture_peaks), max(poll_peaks), np.median(retained), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=2880)
+    parser.add_argument("--height", type=int, default=1800)
+    parser.add_argument(
+        "--region",
+        type=float,
+        default=0.8,
+        help="Window region as a fraction of the screen (1 = full screen)",
+    )
+    parser.add_argument("--polls", type=int, default=20)
+    args = parser.parse_args()
+
+    images = os.path.join(ROOT, "images")
+    scale = DisplayScale(capture=1.0, ui=1.0)
+    names = template_names(images)[: len(MODES)]
+    # One template per matching mode, so every preprocessed view is exercised
+    thresholds = {name: {"mode": mode} for name, mode in zip(names, MODES)}
+
+    screen = make_screen(Matcher(images, scale), names, (args.height, args.width))
+    matcher_module.pyscreeze.screenshot = lambda: screen
+    width, height = int(args.width * args.region), int(args.height * args.region)
+    region = ((args.width - width) // 2, (args.height - height) // 2, width, height)
+    print(
+        f"{args.width}x{args.height} screen, {width}x{height} region, "
+        f"{len(names)} templates ({', '.join(MODES)}), {args.polls} polls"
+    )
+
+    results = {}
+    for label, reuse in (("allocating", False), ("reusable buffers", True)):
+        matcher = Matcher(images, scale, thresholds=thresholds, reuse_buffers=reuse)
+        matches, capture, peak, retained, seconds = measure(
+            matcher, names, region, args.polls
+        )
+        results[label] = matches
+        pool = f", pool {matcher.buffers.nbytes / 2**20:.1f} MB" if reuse else ""
+        print(
+            f"{label:>16}: peak {capture / 2**20:5.1f} MB capturing, "
+            f"{peak / 2**20:5.1f} MB per poll, "
+            f"steady state {retained / 2**20:4.2f} MB, "
+            f"{seconds * 1000:5.0f} ms/poll{pool}"
+        )
+
+    allocating, pooled = results.values()
+    same = all(allocating[name] == pooled[name] for name in names)
+    print(f"Same matches: {same}")
+
+
+if __name__ == "__main__":
+    main()
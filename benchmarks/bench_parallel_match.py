@@ -0,0 +1,61 @@
+"""Benchmark sequential vs thread-pool template evaluation on one frame.
+
+Builds a synthetic 2560x1440 capture containing the machine-tab templates
+and scores the full state probe (idle, printing, low ink, inject ink) both
+ways. Run on the target host, since the speed-up depends on its cores:
+
+    python benchmarks/bench_parallel_match.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from workflows.matcher import MAX_WORKERS, Frame, Matcher  # noqa: E402
+
+PROBE = ["idle.png", "printing.png", "low-ink.png", "inject-ink.png"]
+ROUNDS = 10
+
+
+def synthetic_frame(matcher):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (1440, 2560, 3), dtype=np.uint8)
+    for index, name in enumerate(PROBE):
+        template = matcher.template(name)
+        top, left = 200 + index * 250, 300 + index * 400
+        image[top : top + template.shape[0], left : left + template.shape[1]] = template
+    return Frame(image, 0, 0)
+
+
+def timed(func):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def main():
+    matcher = Matcher(
+        image_path=os.path.join(os.path.dirname(__file__), "..", "images")
+    )
+    frame = synthetic_frame(matcher)
+
+    sequential = timed(lambda: [matcher.locate(name, frame=frame) for name in PROBE])
+    matcher.locate_all(PROBE, frame=frame)  # start the pool
+    parallel = timed(lambda: matcher.locate_all(PROBE, frame=frame))
+
+    found = matcher.locate_all(PROBE, frame=frame)
+    assert all(found.values()), f"probe templates not found: {found}"
+
+    print(f"cpus={os.cpu_count()} workers={MAX_WORKERS} templates={len(PROBE)}")
+    print(f"sequential: {sequential * 1000:.1f} ms per probe")
+    print(f"parallel:   {parallel * 1000:.1f} ms per probe")
+    print(f"speed-up:   {sequential / parallel:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare canvas-aware job scheduling with FIFO order on a simulated job stream.
+
+Jobs for the 12mm and 16mm canvases arrive at random (a Poisson stream,
+as busy as the printer can keep up with by default) and run one at a
+time. A job on another canvas than the previous one pays --switch-setup
+seconds of setup, a job on the same canvas --same-setup. Runs the same
+arrivals once in arrival order and once through JobScheduler, and
+reports throughput, the time the printer was busy, canvas switches and
+the time jobs wait.
+
+    python benchmarks/bench_scheduler.py
+    python benchmarks/bench_scheduler.py --jobs 500 --load 1.2 --fairness-window 300
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import job_scheduler  # noqa: E402
+from job_scheduler import JobScheduler  # noqa: E402
+
+
+class SimulatedClock:
+    """Stands in for the time module inside job_scheduler"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def make_arrivals(count, mean_interval, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.exponential(mean_interval, count))
+    canvases = rng.integers(0, 2, count)
+    return list(zip(times.tolist(), canvases.tolist()))
+
+
+def simulate(arrivals, fairness_window, args):
+    """Runs the jobs; returns (finish time, busy time, canvas switches, waits)"""
+    clock = job_scheduler.time = SimulatedClock()
+    scheduler = JobScheduler(fairness_window, max_pending=len(arrivals))
+    waits = []
+    canvas, switches, index, busy = None, 0, 0, 0.0
+    while index < len(arrivals) or scheduler.pending:
+        if not scheduler.pending:
+            clock.now = max(clock.now, arrivals[index][0])
+        while index < len(arrivals) and arrivals[index][0] <= clock.now:
+            arrival, job_canvas = arrivals[index]
+            now = clock.now
+            clock.now = arrival  # queued when it arrived
+            scheduler.add(f"{12 + 4 * job_canvas}mm", job_canvas)
+            clock.now = now
+            index += 1
+        job = scheduler.next()
+        waits.append(clock.now - job.queued_at)
+        switched = canvas is not None and job.canvas_index != canvas
+        switches += switched
+        canvas = job.canvas_index
+        setup = args.switch_setup if switched else args.same_setup
+        clock.now += setup + args.print_time
+        busy += setup + args.print_time
+    return clock.now, busy, switches, waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--print-time", type=float, default=840)
+    parser.add_argument("--switch-setup", type=float, default=60)
+    parser.add_argument("--same-setup", type=float, default=20)
+    parser.add_argument(
+        "--load",
+        type=float,
+        default=1.0,
+        help="Arrival rate relative to what the printer can handle",
+    )
+    parser.add_argument("--fairness-window", type=float, default=600)
+    args = parser.parse_args()
+
+    mean_interval = (args.print_time + args.same_setup) / args.load
+    arrivals = make_arrivals(args.jobs, mean_interval)
+    print(
+        f"{args.jobs} jobs, one every {mean_interval:.0f}s on average, "
+        f"{args.print_time:g}s prints, {args.switch_setup:g}s setup after a "
+        f"canvas switch vs. {args.same_setup:g}s"
+    )
+
+    results = {}
+    for label, window in (("FIFO", 0), ("canvas-aware", args.fairness_window)):
+        finished, busy, switches, waits = simulate(arrivals, window, args)
+        results[label] = (finished, busy)
+        print(
+            f"{label:>12}: {args.jobs / finished * 3600:.3f} jobs/h, "
+            f"busy {busy / 3600:.1f}h, "
+            f"{switches} canvas switches, wait median {np.median(waits):.0f}s, "
+            f"p95 {np.percentile(waits, 95):.0f}s, max {max(waits):.0f}s"
+        )
+
+    (fifo, fifo_busy), (scheduled, scheduled_busy) = results.values()
+    print(
+        f"Throughput gain over FIFO: {fifo / scheduled - 1:.1%} "
+        f"(capacity when never idle: {fifo_busy / scheduled_busy - 1:.1%}, "
+        f"{(fifo_busy - scheduled_busy) / 60:.0f} min of setup saved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Check accuracy and cost of each matching mode against the real templates.
+
+Every template in images/ is placed on a synthetic UI-like canvas. For each
+mode the script checks that the template is found at the right position,
+both unchanged and with a theme-like brightness shift plus anti-aliasing
+blur, and reports the best score on a canvas where the template is absent
+(the near-miss level). The margin between the two is what a threshold has
+to fit into; templates with less than MIN_MARGIN are listed as ambiguous
+(usually look-alike buttons such as finish/stop-finish).
+
+    python benchmarks/check_match_modes.py
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from workflows.matcher import MODES, Frame, Matcher  # noqa: E402
+
+IMAGE_PATH = os.path.join(os.path.dirname(__file__), "..", "images")
+CANVAS_SIZE = (1440, 2560)
+POSITION_TOLERANCE = 2  # pixels
+MIN_MARGIN = 0.05
+
+
+def place_templates(matcher, names, skip=None):
+    """Lay templates out on a light canvas; returns the frame and positions"""
+    canvas = np.full(CANVAS_SIZE + (3,), 242, np.uint8)
+    positions = {}
+    left, top, row_height = 20, 20, 0
+    for name in names:
+        template = matcher.template(name)
+        height, width = template.shape[:2]
+        if left + width > CANVAS_SIZE[1]:
+            left, top, row_height = 20, top + row_height + 20, 0
+        if name != skip:
+            canvas[top : top + height, left : left + width] = template
+        positions[name] = (left, top)
+        left += width + 20
+        row_height = max(row_height, height)
+    return canvas, positions
+
+
+def perturb(image):
+    """Brightness shift (theme) plus a slight blur (anti-aliasing)"""
+    shifted = cv2.convertScaleAbs(image, alpha=0.95, beta=12)
+    return cv2.GaussianBlur(shifted, (3, 3), 0)
+
+
+def main():
+    matcher = Matcher(image_path=IMAGE_PATH)
+    names = sorted(n for n in os.listdir(IMAGE_PATH) if n.endswith(".png"))
+    canvas, positions = place_templates(matcher, names)
+    variants = {"exact": Frame(canvas), "perturbed": Frame(perturb(canvas))}
+
+    print(
+        f"{'mode':<10} {'found':>6} {'found*':>7} {'median score*':>14} "
+        f"{'median margin':>14} {'ms/match':>9}  ambiguous"
+    )
+    for mode in MODES:
+        matcher.thresholds = {name: {"mode": mode} for name in names}
+        found = {key: 0 for key in variants}
+        scores, margins, ambiguous = [], [], []
+        elapsed = 0.0
+
+        for name in names:
+            for key, frame in variants.items():
+                started = time.perf_counter()
+                score, (x, y) = matcher.score(name, frame)
+                elapsed += time.perf_counter() - started
+                expected = positions[name]
+                if (
+                    abs(x - expected[0]) <= POSITION_TOLERANCE
+                    and abs(y - expected[1]) <= POSITION_TOLERANCE
+                ):
+                    found[key] += 1
+
+            absent_canvas, _ = place_templates(matcher, names, skip=name)
+            absent, _ = matcher.score(name, Frame(perturb(absent_canvas)))
+            present, _ = matcher.score(name, variants["perturbed"])
+            scores.append(present)
+            margins.append(present - absent)
+            if present - absent < MIN_MARGIN:
+                ambiguous.append(name)
+
+        per_match = elapsed / (len(names) * len(variants)) * 1000
+        print(
+            f"{mode:<10} {found['exact']:>3}/{len(names):<2} "
+            f"{found['perturbed']:>3}/{len(names):<3} {np.median(scores):>14.3f} "
+            f"{np.median(margins):>14.3f} {per_match:>9.1f}  {', '.join(ambiguous)}"
+        )
+    print("found* = with brightness shift and blur")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compile the template images into a memory-mapped bundle.
+
+Writes images/templates.bin (every template as raw BGR, grayscale and
+pyramid level arrays, plus masks for templates with transparent pixels)
+and images/templates.index.json (array offsets and the templates.json
+metadata). The service maps the bundle at startup instead of decoding the
+PNGs. It falls back to the PNGs while the bundle is missing or older than
+any template or templates.json, so rerun this after changing them.
+
+    python build_templates.py
+    python build_templates.py --check      # only report whether it is current
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from workflows.template_bundle import (
+    BUNDLE_DATA,
+    TemplateBundle,
+    build_bundle,
+    template_names,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", default="images", help="Template directory")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if the bundle is missing or stale, without building",
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        if TemplateBundle.load(args.images) is None:
+            print("Template bundle is missing or stale")
+            sys.exit(1)
+        print("Template bundle is up to date")
+        return
+
+    started = time.perf_counter()
+    count = build_bundle(args.images)
+    built = time.perf_counter() - started
+    size = os.path.getsize(os.path.join(args.images, BUNDLE_DATA))
+    print(f"Bundled {count} templates ({size / 1024:.0f} KB) in {built:.2f}s")
+
+    # Compare the startup cost of both ways of loading the templates
+    import cv2
+
+    started = time.perf_counter()
+    for name in template_names(args.images):
+        cv2.imread(os.path.join(args.images, name), cv2.IMREAD_COLOR)
+    decoded = time.perf_counter() - started
+    started = time.perf_counter()
+    bundle = TemplateBundle.load(args.images)
+    for name in template_names(args.images):
+        bundle.array(name)
+    mapped = time.perf_counter() - started
+    print(f"Load: {decoded * 1000:.1f} ms decoding PNGs, {mapped * 1000:.1f} ms mapped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BIND_HOST = "0.0.0.0"  # reachable from the LAN, e.g. by the start button device
+
+
+def broker_config(port, bind_host=DEFAULT_BIND_HOST):
+    """amqtt broker config: one TCP listener, anonymous access like mosquitto.conf"""
+    return {
+        "listeners": {"default": {"type": "tcp", "bind": f"{bind_host}:{port}"}},
+        "plugins": {
+            "amqtt.plugins.authentication.AnonymousAuthPlugin": {
+                "allow_anonymous": True
+            },
+        },
+    }
+
+
+async def start_broker(port, bind_host=DEFAULT_BIND_HOST):
+    """Start an amqtt broker on the running event loop; returns it"""
+    # Imported here so the client alone does not pay for the broker modules
+    from amqtt.broker import Broker
+
+    broker = Broker(broker_config(port, bind_host))
+    await broker.start()
+    logger.info(f"Embedded MQTT broker listening on {bind_host}:{port}")
+    return broker
+
+
+def run_broker_forever(port, bind_host=DEFAULT_BIND_HOST):
+    """Run only the broker until interrupted"""
+
+    async def serve():
+        broker = await start_broker(port, bind_host)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await broker.shutdown()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Broker stopped")
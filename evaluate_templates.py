@@ -0,0 +1,170 @@
+"""Evaluate the templates against recorded captures from past jobs.
+
+Scores every template against every capture in failure dumps (or folders
+of captures, e.g. from replay_failure.py --extract) and reports per
+template precision and recall at its current threshold. Identical
+captures are scored once. The remaining frames are matched in stacked
+batches, one matchTemplate call per template and batch. Run it after
+changing templates, thresholds or matching modes.
+
+By default a template's label on a capture is the decision recorded live
+for it, so the report shows where the current setup disagrees with the
+one that ran the job. A labels file gives real ground truth instead:
+{"frame_000012.jpg": ["idle.png", "print.png"], ...} lists the templates
+visible on each labelled capture.
+
+    python evaluate_templates.py data/failures/*.zip
+    python evaluate_templates.py data/failures/*.zip --labels labels.json
+    python evaluate_templates.py frames/ --ui-scale 2 --timeline scores.json
+    python evaluate_templates.py data/failures/*.zip --min-recall 0.95
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from workflows.batch_eval import FrameSequence, evaluate, precision_recall
+from workflows.display_scale import DisplayScale
+from workflows.match_stats import load_thresholds
+from workflows.matcher import Matcher
+from workflows.template_bundle import template_names
+
+
+def format_rate(rate):
+    return "   -" if rate is None else f"{rate:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "inputs", nargs="+", help="Failure dumps (.zip) or folders of captures"
+    )
+    parser.add_argument(
+        "--images", default="images", help="Template directory (default: images)"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default="data",
+        help="Data directory with thresholds.json (default: data)",
+    )
+    parser.add_argument("--labels", help="JSON file of the templates on each capture")
+    parser.add_argument("--templates", nargs="+", help="Only evaluate these templates")
+    parser.add_argument(
+        "--capture-scale",
+        type=float,
+        default=1.0,
+        help="Capture scale of images in folders (default: 1)",
+    )
+    parser.add_argument(
+        "--ui-scale",
+        type=float,
+        default=1.0,
+        help="UI scale of images in folders (default: 1)",
+    )
+    parser.add_argument(
+        "--timeline", help="Write every score per capture to this JSON file"
+    )
+    parser.add_argument(
+        "--min-precision",
+        type=float,
+        help="Exit with status 1 if a template's precision is below this",
+    )
+    parser.add_argument(
+        "--min-recall",
+        type=float,
+        help="Exit with status 1 if a template's recall is below this",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sequence = FrameSequence()
+    folder_scale = DisplayScale(capture=args.capture_scale, ui=args.ui_scale)
+    for path in args.inputs:
+        if os.path.isdir(path):
+            sequence.add_directory(path, folder_scale)
+        else:
+            sequence.add_dump(path)
+    loaded = time.perf_counter() - started
+
+    names = args.templates or template_names(args.images)
+    frames = sequence.frames
+    if args.labels:
+        with open(args.labels) as f:
+            labels = json.load(f)
+        frames = [
+            (
+                frame._replace(
+                    labels={name: name in labels[frame.name] for name in names}
+                )
+                if frame.name in labels
+                else frame._replace(labels={})
+            )
+            for frame in frames
+        ]
+
+    thresholds = load_thresholds(args.data_dir)
+    matchers = {}
+
+    def matcher_for_scale(scale):
+        if scale not in matchers:
+            matchers[scale] = Matcher(args.images, scale, thresholds=thresholds)
+        return matchers[scale]
+
+    started = time.perf_counter()
+    scores = evaluate(sequence, matcher_for_scale, names)
+    scored = time.perf_counter() - started
+    print(
+        f"{len(frames)} captures, {sequence.unique_count} unique, "
+        f"{len(names)} templates: loaded in {loaded:.2f}s, scored in {scored:.2f}s "
+        f"({sequence.unique_count * len(names) / max(scored, 1e-9):.0f} matches/s)\n"
+    )
+
+    print(
+        f"{'template':<28} {'mode':<9} {'thresh':>6} {'tp':>5} {'fp':>5} "
+        f"{'fn':>5} {'tn':>5} {'prec':>6} {'recall':>6}"
+    )
+    failed = []
+    reference = Matcher(args.images, thresholds=thresholds)
+    for name in names:
+        threshold = reference.confidence(name)
+        result = precision_recall(frames, scores[name], name, threshold)
+        print(
+            f"{name:<28} {reference.mode(name):<9} {threshold:>6.3f} "
+            f"{result['tp']:>5} {result['fp']:>5} {result['fn']:>5} {result['tn']:>5} "
+            f"{format_rate(result['precision']):>6} {format_rate(result['recall']):>6}"
+        )
+        for key, minimum in (
+            ("precision", args.min_precision),
+            ("recall", args.min_recall),
+        ):
+            if (
+                minimum is not None
+                and result[key] is not None
+                and result[key] < minimum
+            ):
+                failed.append(f"{name} {key} {result[key]:.3f} < {minimum}")
+
+    if args.timeline:
+        timeline = {
+            "frames": [
+                {"source": frame.source, "file": frame.name, "time": frame.time}
+                for frame in frames
+            ],
+            "scores": {
+                name: [round(float(scores[name][frame.uid]), 4) for frame in frames]
+                for name in names
+            },
+        }
+        with open(args.timeline, "w") as f:
+            json.dump(timeline, f)
+        print(f"\nSaved score timelines to {args.timeline}")
+
+    if failed:
+        print("\nBelow the minimum:\n  " + "\n  ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
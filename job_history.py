@@ -0,0 +1,289 @@
+import logging
+import os
+import sqlite3
+import statistics
+import threading
+import time
+
+from log_pipeline import log_context
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "history.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    print_type TEXT NOT NULL,
+    profile TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    outcome TEXT,          -- success, failed, stopped, hung or error
+    failure_step TEXT,     -- workflow that was running when the job failed (not stopped)
+    low_ink INTEGER,
+    queued_at REAL         -- when the job was accepted, before the scheduler ran it
+);
+CREATE TABLE IF NOT EXISTS steps (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    workflow TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    polls INTEGER NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clicks (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    workflow TEXT NOT NULL,
+    label TEXT NOT NULL,
+    waited REAL NOT NULL,  -- seconds waited for the UI after the click
+    fixed REAL NOT NULL,   -- the fixed wait it replaced, also the upper bound
+    ended TEXT NOT NULL    -- fixed, target, stable or timeout
+);
+CREATE INDEX IF NOT EXISTS jobs_started_at ON jobs(started_at);
+CREATE INDEX IF NOT EXISTS steps_job_id ON steps(job_id);
+CREATE INDEX IF NOT EXISTS clicks_job_id ON clicks(job_id);
+"""
+
+# Everything before this workflow is preflight overhead
+PRINT_STEP = "Start Print"
+
+
+class JobHistory:
+    """Every print job and its workflow steps, recorded in a local SQLite file"""
+
+    def __init__(self, data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, HISTORY_FILE)
+        # Written from the actuator thread, queried from the MQTT loop
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            if "queued_at" not in columns:
+                # History files from before the job scheduler
+                self._db.execute("ALTER TABLE jobs ADD COLUMN queued_at REAL")
+
+    def start_job(self, print_type, profile=None, queued_at=None):
+        """Record the start of a job; returns its JobRecord"""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (print_type, profile, started_at, queued_at) "
+                "VALUES (?, ?, ?, ?)",
+                (print_type, profile, time.time(), queued_at),
+            )
+        return JobRecord(self, cursor.lastrowid)
+
+    def _add_step(self, job_id, workflow, started_at, duration, polls, ok, clicks):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, workflow, started_at, duration, polls, int(ok)),
+            )
+            self._db.executemany(
+                "INSERT INTO clicks VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, workflow, *click) for click in clicks],
+            )
+
+    def _finish_job(self, job_id, outcome, failure_step, low_ink):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET finished_at = ?, outcome = ?, failure_step = ?, "
+                "low_ink = ? WHERE id = ?",
+                (time.time(), outcome, failure_step, int(low_ink), job_id),
+            )
+
+    def report(self, hours=24):
+        """Throughput analytics over the jobs started in the last `hours`"""
+        since = time.time() - hours * 3600
+        with self._lock:
+            jobs = self._db.execute(
+                "SELECT id, started_at, finished_at, outcome, failure_step, low_ink, "
+                "print_type, queued_at FROM jobs WHERE started_at >= ? "
+                "ORDER BY started_at",
+                (since,),
+            ).fetchall()
+            steps = self._db.execute(
+                "SELECT steps.job_id, workflow, steps.started_at, duration, polls "
+                "FROM steps JOIN jobs ON jobs.id = steps.job_id "
+                "WHERE jobs.started_at >= ?",
+                (since,),
+            ).fetchall()
+            clicks = self._db.execute(
+                "SELECT label, waited, fixed, ended "
+                "FROM clicks JOIN jobs ON jobs.id = clicks.job_id "
+                "WHERE jobs.started_at >= ?",
+                (since,),
+            ).fetchall()
+
+        finished = [job for job in jobs if job[2] is not None]
+        outcomes = {}
+        for job in finished:
+            outcomes[job[3]] = outcomes.get(job[3], 0) + 1
+
+        # Preflight: from the job start until the print itself starts
+        job_starts = {job[0]: job[1] for job in jobs}
+        preflight_by_job = {
+            job_id: started_at - job_starts[job_id]
+            for job_id, workflow, started_at, _, _ in steps
+            if workflow == PRINT_STEP
+        }
+        preflight = list(preflight_by_job.values())
+
+        # Failure rate per step: jobs that failed in a step / runs of that step.
+        # A stopped job did not fail; rows from before stopped jobs had no
+        # failure step may still name one.
+        runs, failures, polls = {}, {}, {}
+        for _, workflow, _, _, step_polls in steps:
+            runs[workflow] = runs.get(workflow, 0) + 1
+            polls[workflow] = polls.get(workflow, 0) + step_polls
+        for job in finished:
+            if job[3] not in ("success", "stopped") and job[4]:
+                failures[job[4]] = failures.get(job[4], 0) + 1
+
+        # Post-click waits: time spent vs. the fixed sleeps they replace
+        waits = {}
+        for label, waited, _, ended in clicks:
+            wait = waits.setdefault(label, {"waited": [], "ended": {}})
+            wait["waited"].append(waited)
+            wait["ended"][ended] = wait["ended"].get(ended, 0) + 1
+        waited_total = sum(click[1] for click in clicks)
+        fixed_total = sum(click[2] for click in clicks)
+
+        # Idle gaps: from one job finishing to the next one starting
+        gaps = [
+            later[1] - earlier[2]
+            for earlier, later in zip(finished, finished[1:])
+            if later[1] >= earlier[2]
+        ]
+
+        # Canvas switches in the order jobs ran vs. the order they were queued
+        # (FIFO). Each switch costs the difference in preflight time between
+        # jobs after a switch and jobs on the canvas already selected.
+        queued = [job for job in jobs if job[7] is not None]
+        fifo = sorted(queued, key=lambda job: job[7])
+        after_switch, same_canvas = [], []
+        for previous, job in zip(jobs, jobs[1:]):
+            if job[0] in preflight_by_job:
+                setup = after_switch if job[6] != previous[6] else same_canvas
+                setup.append(preflight_by_job[job[0]])
+        switch_cost = None
+        if after_switch and same_canvas:
+            switch_cost = statistics.median(after_switch) - statistics.median(
+                same_canvas
+            )
+        switches = _switches(queued)
+        fifo_switches = _switches(fifo)
+        saved = None
+        if switch_cost is not None:
+            saved = round((fifo_switches - switches) * switch_cost, 1)
+        earliest_later = float("inf")
+        reordered = 0
+        for job in reversed(queued):
+            if job[7] > earliest_later:
+                reordered += 1  # started before a job that had been queued earlier
+            earliest_later = min(earliest_later, job[7])
+
+        return {
+            "hours": hours,
+            "jobs": len(jobs),
+            "jobs_per_hour": round(len(jobs) / hours, 2),
+            "outcomes": outcomes,
+            "low_ink_jobs": sum(1 for job in finished if job[5]),
+            "median_preflight_s": _median(preflight),
+            "steps": {
+                workflow: {
+                    "runs": runs[workflow],
+                    "failures": failures.get(workflow, 0),
+                    "failure_rate": round(
+                        failures.get(workflow, 0) / runs[workflow], 3
+                    ),
+                    "polls": polls[workflow],
+                }
+                for workflow in sorted(runs)
+            },
+            "click_waits": {
+                "clicks": len(clicks),
+                "waited_s": round(waited_total, 1),
+                "saved_s": round(fixed_total - waited_total, 1) or 0.0,
+                "labels": {
+                    label: {
+                        "clicks": len(wait["waited"]),
+                        "median_s": round(statistics.median(wait["waited"]), 2),
+                        "ended": wait["ended"],
+                    }
+                    for label, wait in sorted(waits.items())
+                },
+            },
+            "scheduling": {
+                "reordered": reordered,
+                "canvas_switches": switches,
+                "fifo_canvas_switches": fifo_switches,
+                "switch_cost_s": (
+                    round(switch_cost, 1) if switch_cost is not None else None
+                ),
+                "saved_s": saved,
+            },
+            "idle_gaps": {
+                "count": len(gaps),
+                "median_s": _median(gaps),
+                "max_s": round(max(gaps), 1) if gaps else None,
+                "total_s": round(sum(gaps), 1),
+            },
+        }
+
+
+class JobRecord:
+    """Collects the steps of one running job"""
+
+    def __init__(self, history, job_id):
+        self.history = history
+        self.job_id = job_id
+        self.last_step = None
+
+    def step(self, workflow, *args, action=None, **kwargs):
+        """Run a workflow, recording its duration, poll count, result and
+        the waits after its clicks.
+
+        action is the workflow method to call, run() by default.
+        """
+        self.last_step = workflow.name
+        started_at = time.time()
+        polls = workflow.polls
+        clicks = len(workflow.click_waits)
+        ok = False
+        try:
+            with log_context(step=workflow.name):
+                result = (action or workflow.run)(*args, **kwargs)
+            ok = bool(result)
+            return result
+        finally:
+            try:
+                self.history._add_step(
+                    self.job_id,
+                    workflow.name,
+                    started_at,
+                    time.time() - started_at,
+                    workflow.polls - polls,
+                    ok,
+                    workflow.click_waits[clicks:],
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Could not record step {workflow.name}: {str(e)}")
+
+    def finish(self, outcome, low_ink=False):
+        """Record the outcome; the last step run is the failure step if the job failed"""
+        failure_step = self.last_step if outcome not in ("success", "stopped") else None
+        try:
+            self.history._finish_job(self.job_id, outcome, failure_step, low_ink)
+        except sqlite3.Error as e:
+            logger.error(f"Could not record job outcome: {str(e)}")
+
+
+def _switches(jobs):
+    """Canvas switches when running jobs in the given order"""
+    return sum(1 for previous, job in zip(jobs, jobs[1:]) if job[6] != previous[6])
+
+
+def _median(values):
+    return round(statistics.median(values), 1) if values else None
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAIRNESS_WINDOW = 600.0  # seconds; jobs queued this much later may go first
+DEFAULT_MAX_PENDING = 20
+
+PendingJob = namedtuple("PendingJob", ["print_type", "canvas_index", "queued_at"])
+
+
+class JobScheduler:
+    """Orders pending print jobs so that jobs for the same canvas run back to back.
+
+    Switching between the 12mm and 16mm canvases means selecting the other
+    canvas and its zero point alignment again. Instead of first come, first
+    served, a job for the canvas of the job that ran last goes ahead of the
+    oldest pending job if it was queued at most fairness_window seconds
+    after it. A job is therefore only overtaken by jobs from that window,
+    and a fairness window of 0 is plain FIFO order.
+
+    After a job ends in an error the queue can be held: pending jobs stay
+    queued but none is handed out until release() or clear().
+
+    Jobs are added from the MQTT loop and taken from the actuator thread.
+    """
+
+    def __init__(
+        self, fairness_window=DEFAULT_FAIRNESS_WINDOW, max_pending=DEFAULT_MAX_PENDING
+    ):
+        self.fairness_window = fairness_window
+        self.max_pending = max_pending
+        self._pending = []  # in arrival order
+        self._canvas = None  # canvas of the job that ran last
+        self._setup_canvas = None  # canvas whose setup the last job left selected
+        self._held = None  # why no job is handed out, or None
+        self._lock = threading.Lock()
+
+    def add(self, print_type, canvas_index):
+        """Queue a job; returns (accepted, reason)"""
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                return False, f"{len(self._pending)} jobs already pending"
+            self._pending.append(PendingJob(print_type, canvas_index, time.time()))
+        return True, None
+
+    def next(self):
+        """Take the job to run next, or None if there is none or the queue is held"""
+        with self._lock:
+            if not self._pending or self._held is not None:
+                return None
+            oldest = self._pending[0]
+            same_canvas = (
+                job
+                for job in self._pending
+                if job.canvas_index == self._canvas
+                and job.queued_at - oldest.queued_at <= self.fairness_window
+            )
+            job = next(same_canvas, oldest)
+            self._pending.remove(job)
+            self._canvas = job.canvas_index
+
+        if job is not oldest:
+            logger.info(
+                f"Running {job.print_type} job ahead of the {oldest.print_type} job "
+                f"queued {job.queued_at - oldest.queued_at:.0f}s before it, "
+                "its canvas is already selected"
+            )
+        return job
+
+    def reuses_setup(self, job):
+        """Whether the previous job left this job's canvas and alignment selected"""
+        return self._setup_canvas == job.canvas_index
+
+    def finished(self, job, success):
+        """Record a job's result; only a successful job leaves a reusable setup"""
+        self._setup_canvas = job.canvas_index if success else None
+
+    def hold(self, reason):
+        """Keep pending and new jobs from running until release() or clear()"""
+        with self._lock:
+            self._held = reason
+
+    def release(self):
+        """Let a held queue run again; returns the number of jobs it released"""
+        with self._lock:
+            if self._held is None:
+                return 0
+            self._held = None
+            return len(self._pending)
+
+    def clear(self):
+        """Drop every pending job and release the queue; returns the dropped jobs"""
+        with self._lock:
+            dropped, self._pending = self._pending, []
+            self._setup_canvas = None
+            self._held = None
+        return dropped
+
+    @property
+    def held(self):
+        """Why the queue is held, or None"""
+        return self._held
+
+    @property
+    def pending(self):
+        """Print types of the pending jobs in arrival order"""
+        with self._lock:
+            return [job.print_type for job in self._pending]
@@ -0,0 +1,243 @@
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+DEFAULT_QUEUE_SIZE = 10000  # records buffered while the writer is behind
+DEFAULT_REPEAT_INTERVAL = 60.0  # seconds an identical message is held back
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+STOP_TIMEOUT = 5.0  # seconds to wait for the writer to catch up at exit
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(context)s%(message)s"
+CONTEXT_FIELDS = ("job_id", "step")
+
+# Fields attached to every record logged from the current thread or task
+_context = contextvars.ContextVar("log_context", default={})
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Attach fields (job_id, step) to every record logged inside the block"""
+    token = bind_log_context(**fields)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def bind_log_context(**fields):
+    """Attach fields until reset_log_context(token) is called with the result"""
+    return _context.set({**_context.get(), **fields})
+
+
+def reset_log_context(token):
+    _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the context fields onto the record.
+
+    Runs in the logging thread, before the record is queued, since the
+    context belongs to that thread.
+    """
+
+    def filter(self, record):
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, context.get(field))
+        record.context = "".join(
+            f"[{field}={context[field]}] "
+            for field in CONTEXT_FIELDS
+            if field in context
+        )
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the context fields"""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        repeated = getattr(record, "repeated", None)
+        if repeated:
+            entry["repeated"] = repeated
+        dropped = getattr(record, "dropped", None)
+        if dropped:
+            entry["dropped"] = dropped
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without ever blocking the caller.
+
+    When the queue is full (the writer is stuck on a slow console) records
+    are dropped and counted, and the count rides on the next queued record.
+    """
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.dropped:
+            record.dropped = self.dropped
+            record.msg = f"{record.msg} ({self.dropped} earlier log records dropped)"
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+
+class RepeatSummarizer:
+    """Collapses runs of identical messages into one summary line.
+
+    Below WARNING, a message that a logger repeats within `interval`
+    seconds (e.g. a poll loop's "Waiting for printer...") is held back and
+    counted. The count is written when the logger moves on to a different
+    message, or with the message itself once `interval` has passed.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, handlers, interval=DEFAULT_REPEAT_INTERVAL):
+        self.handlers = handlers
+        self.interval = interval
+        self._last = (
+            {}
+        )  # logger name -> [message, time written, held back, last record]
+
+    def handle(self, record):
+        if record.levelno < logging.WARNING:
+            message = record.getMessage()
+            last = self._last.get(record.name)
+            if last is not None and last[0] == message:
+                if record.created - last[1] < self.interval:
+                    last[2] += 1
+                    last[3] = record
+                    return
+                if last[2]:
+                    record.repeated = last[2]
+                    record.msg = f"{message} (repeated {last[2]} times)"
+                    record.args = None
+            elif last is not None and last[2]:
+                self._summarize(last)
+            self._last[record.name] = [message, record.created, 0, record]
+        self._emit(record)
+
+    def flush(self):
+        """Write the summaries of messages still held back"""
+        for last in self._last.values():
+            if last[2]:
+                self._summarize(last)
+                last[2] = 0
+
+    def _summarize(self, last):
+        message, written, count, record = last
+        summary = logging.makeLogRecord(record.__dict__)
+        summary.msg = (
+            f"{message} (repeated {count} times in {record.created - written:.0f}s)"
+        )
+        summary.args = None
+        summary.repeated = count
+        self._emit(summary)
+
+    def _emit(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room in a full queue instead of failing
+        self.queue.put(self._sentinel, timeout=STOP_TIMEOUT)
+
+
+class LogPipeline:
+    """Root logging through a queue and a background writer thread.
+
+    Loggers only put records on a bounded queue, so a console that blocks
+    on writes (e.g. a paused Windows console with text selected) never
+    stalls the print thread or the MQTT loop. A QueueListener thread writes
+    to stdout and, optionally, to a rotating JSON lines file.
+    """
+
+    def __init__(
+        self,
+        level=logging.INFO,
+        json_console=False,
+        log_file=None,
+        max_bytes=DEFAULT_MAX_BYTES,
+        backup_count=DEFAULT_BACKUP_COUNT,
+        repeat_interval=DEFAULT_REPEAT_INTERVAL,
+        queue_size=DEFAULT_QUEUE_SIZE,
+    ):
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(
+            JsonFormatter() if json_console else logging.Formatter(TEXT_FORMAT)
+        )
+        handlers = [console]
+        if log_file:
+            rotating = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8",
+            )
+            rotating.setFormatter(JsonFormatter())
+            handlers.append(rotating)
+
+        self.summarizer = RepeatSummarizer(handlers, repeat_interval)
+        self.handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        self.handler.addFilter(ContextFilter())
+        self.listener = _Listener(self.handler.queue, self.summarizer)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+
+    def start(self):
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Write out everything still queued and stop the writer thread"""
+        try:
+            self.listener.stop()
+        except queue.Full:
+            return  # the writer is stuck; its daemon thread ends with the process
+        self.summarizer.flush()
+        if self.handler.dropped:
+            self.summarizer.handle(
+                logging.makeLogRecord(
+                    {
+                        "name": __name__,
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": f"{self.handler.dropped} log records dropped",
+                        "dropped": self.handler.dropped,
+                        "context": "",
+                    }
+                )
+            )
+        for handler in self.summarizer.handlers:
+            handler.flush()
@@ -1,45 +1,77 @@
-import pyautogui
-import pywinctl as pwc
-from workflows.reset_ui import ResetUIWorkflow
-from workflows.check_if_online import CheckIfOnline
-from workflows.check_if_printer_idle import CheckIfIdle
-from workflows.scan_tray import ScanTray
-from workflows.workflow import Workflow
-from workflows.start_print import StartPrint
-from workflows.stop import Stop
-from workflows.check_if_low_ink import CheckIfLowInk
-from workflows.check_if_should_moisturize import CheckIfShouldMoisturize
-from workflows.select_zero_point_alignment import SelectZeroPointAlignment
-import pyscreeze
+import time
+
+# Measured from process start so time-to-first-status includes the imports
+STARTUP_TIME = time.perf_counter()
+
 import threading
 import logging
-import sys
 import json
-import time
+import os
 import argparse
 import asyncio
-from amqtt.client import MQTTClient
+import math
+import subprocess
 from amqtt.mqtt.constants import QOS_1
-
-pyscreeze.USE_IMAGE_NOT_FOUND_EXCEPTION = False
+from mqtt_supervisor import MQTTSupervisor
+from actuator import UIActuator
+from state_store import StateStore
+from job_history import JobHistory
+from job_scheduler import DEFAULT_FAIRNESS_WINDOW, JobScheduler
+from log_pipeline import LogPipeline, bind_log_context, reset_log_context
+from embedded_broker import DEFAULT_BIND_HOST, run_broker_forever, start_broker
+from profiler import DEFAULT_INTERVAL as DEFAULT_PROFILE_INTERVAL, JobProfiler
+from resource_monitor import PRIORITIES, ResourceMonitor, psutil, set_priority
+from workflows.budget import (
+    DEFAULT_MAX_CAPTURES_PER_SECOND,
+    DEFAULT_MAX_MATCHES_PER_SECOND,
+    DetectionBudget,
+)
+
+# GUI automation and OpenCV are slow to import, so they are loaded in the
+# background by load_automation() once MQTT is already up
+pwc = None
+WindowTracker = None
+ResetUIWorkflow = CheckIfOnline = MachinePreflight = ScanTray = None
+StartPrint = Stop = Moisturize = None
+SelectZeroPointAlignment = WorkflowCancelled = Matcher = LayoutMap = None
+MatchStats = load_thresholds = FrameRing = PhaseStats = SettleDetector = None
+HangWatchdog = ApplicationHung = None
+DisplayScale = detect_display_scale = None
+load_display_scale = save_display_scale = None
 
 # Default MQTT Configuration
 DEFAULT_MQTT_BROKER = "localhost"
 DEFAULT_MQTT_PORT = 1883
 DEFAULT_TOPIC_PREFIX = "uv_studio"
 DEFAULT_WINDOW_TITLE = "eufy"
-DEFAULT_RETINA = True
+DEFAULT_IMAGE_PATH = "images"
+DEFAULT_DATA_DIR = "data"
+DEFAULT_MAX_POLL_LATENCY = 10.0
+DEFAULT_SETTLE_TIME = 0.3
+HANG_RECOVERIES = ("none", "refocus", "restart")
+APP_EXIT_WAIT = 2  # seconds for a terminated app to go away before restarting it
+APP_START_TIMEOUT = 60  # seconds to wait for the window of a restarted app
+METRICS_INTERVAL = 10  # seconds between resource usage reports
 
 # Global variables
 print_lock = threading.Lock()
-current_print_thread = None
-current_print_type = False  # False, '12mm', '16mm', 'stopping_12mm', 'stopping_16mm', 'error_12mm', or 'error_16mm'
+state = StateStore()  # print state, low ink, readiness; see ServiceState
 stop_print_event = threading.Event()
-mqtt_client = None
-low_ink = False
+actuator = UIActuator(cancel_event=stop_print_event)
+mqtt_supervisor = None
 mqtt_loop = None
-mqtt_connected = False
-mqtt_reconnect_delay = 5  # seconds
+matcher = None
+layout = None
+window_tracker = None
+phase_stats = None
+settle = None
+watchdog = None
+budget = None
+job_history = None
+scheduler = None
+automation_ready = (
+    threading.Event()
+)  # set once load_automation() is done, even if it failed
 
 
 class Config:
@@ -51,7 +83,23 @@ class Config:
         broker_port=DEFAULT_MQTT_PORT,
         topic_prefix=DEFAULT_TOPIC_PREFIX,
         window_title=DEFAULT_WINDOW_TITLE,
-        retina=DEFAULT_RETINA,
+        ui_scale=None,
+        data_dir=DEFAULT_DATA_DIR,
+        max_poll_latency=DEFAULT_MAX_POLL_LATENCY,
+        max_captures_per_second=DEFAULT_MAX_CAPTURES_PER_SECOND,
+        max_matches_per_second=DEFAULT_MAX_MATCHES_PER_SECOND,
+        max_cpu_percent=None,
+        priority="normal",
+        profile=False,
+        profile_interval=DEFAULT_PROFILE_INTERVAL,
+        start_broker=False,
+        broker_bind=DEFAULT_BIND_HOST,
+        settle=False,
+        settle_time=DEFAULT_SETTLE_TIME,
+        hang_timeout=None,
+        hang_recovery="none",
+        app_path=None,
+        fairness_window=DEFAULT_FAIRNESS_WINDOW,
     ):
         self.mqtt_broker = broker_host
         self.mqtt_port = broker_port
@@ -59,9 +107,28 @@ class Config:
         self.topic_command = f"{topic_prefix}/command"
         self.topic_status = f"{topic_prefix}/status"
         self.topic_control = f"{topic_prefix}/control"
+        self.topic_ack = f"{topic_prefix}/ack"
+        self.topic_metrics = f"{topic_prefix}/metrics"
         self.window_title = window_title
-        self.retina = retina
-        self.image_path = "images" if retina else "images/non-retina"
+        self.ui_scale = ui_scale  # None: detect from the display
+        self.image_path = DEFAULT_IMAGE_PATH
+        self.data_dir = data_dir
+        self.max_poll_latency = max_poll_latency
+        self.max_captures_per_second = max_captures_per_second
+        self.max_matches_per_second = max_matches_per_second
+        self.max_cpu_percent = max_cpu_percent  # None: no poll degradation
+        self.priority = priority
+        self.profile = profile  # write a profile of every job to data/profiles
+        self.profile_interval = profile_interval
+        self.start_broker = start_broker  # run an amqtt broker on the client's loop
+        self.broker_bind = broker_bind
+        self.settle = settle  # end post-click waits once the UI has settled
+        self.settle_time = settle_time
+        self.hang_timeout = hang_timeout  # None: wait out the timeouts of a hung app
+        self.hang_recovery = hang_recovery
+        self.app_path = app_path  # executable started again by hang_recovery="restart"
+        # Longest a job waits while jobs for the selected canvas go first
+        self.fairness_window = fairness_window
 
 
 # Global config instance
@@ -69,27 +136,93 @@ config = Config()
 
 
 # Configure logging
-def setup_logging():
-    """Setup logging with console handler"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[logging.StreamHandler(sys.stdout)],
+def setup_logging(args):
+    """Route all logging through the queue and its background writer thread"""
+    pipeline = LogPipeline(
+        json_console=args.log_format == "json", log_file=args.log_file
     )
-    return logging.getLogger(__name__)
+    pipeline.start()
+    return pipeline
 
 
-# Initialize logger
-logger = setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def load_automation():
+    """Import the GUI/CV stack and decode the templates; runs in the background"""
+    global pwc, WindowTracker, window_tracker
+    global ResetUIWorkflow, CheckIfOnline, MachinePreflight, ScanTray
+    global StartPrint, Stop, Moisturize
+    global SelectZeroPointAlignment, WorkflowCancelled, Matcher, LayoutMap
+    global MatchStats, load_thresholds, FrameRing, PhaseStats, phase_stats
+    global SettleDetector, settle, HangWatchdog, ApplicationHung, watchdog
+    global DisplayScale, detect_display_scale, load_display_scale, save_display_scale
+
+    started = time.perf_counter()
+    try:
+        import pywinctl as pwc
+        from workflows.window_tracker import WindowTracker
+        from workflows.reset_ui import ResetUIWorkflow
+        from workflows.check_if_online import CheckIfOnline
+        from workflows.machine_preflight import MachinePreflight
+        from workflows.scan_tray import ScanTray
+        from workflows.workflow import WorkflowCancelled
+        from workflows.start_print import StartPrint
+        from workflows.stop import Stop
+        from workflows.moisturize import Moisturize
+        from workflows.select_zero_point_alignment import SelectZeroPointAlignment
+        from workflows.matcher import Matcher
+        from workflows.layout import LayoutMap
+        from workflows.match_stats import MatchStats, load_thresholds
+        from workflows.frame_ring import FrameRing
+        from workflows.phase_stats import PhaseStats
+        from workflows.settle import SettleDetector
+        from workflows.watchdog import ApplicationHung, HangWatchdog
+        from workflows.display_scale import (
+            DisplayScale,
+            detect_display_scale,
+            load_display_scale,
+            save_display_scale,
+        )
+
+        import_time = time.perf_counter() - started
+        logger.info(f"Loaded GUI automation modules in {import_time:.2f}s")
+
+        phase_stats = PhaseStats(config.data_dir, config.max_poll_latency)
+        if config.settle:
+            settle = SettleDetector(stable_time=config.settle_time)
+        if config.hang_timeout:
+            watchdog = HangWatchdog(stall_time=config.hang_timeout)
+
+        # Decode and scale the templates now rather than during the first job.
+        # The scale needs the window, so this is skipped if it is not open yet.
+        window_tracker = WindowTracker(config.window_title)
+        window_tracker.start()
+
+        window = window_tracker.window
+        if window or load_display_scale(config.data_dir, config.window_title.lower()):
+            count = get_matcher(window).warm_up()
+            logger.info(f"Warmed up {count} templates")
+        else:
+            logger.info("Window not open yet, templates load on the first job")
+    except Exception as e:
+        logger.error(f"Failed to load GUI automation: {str(e)}")
+        # Reported in the status; queued and new jobs are rejected from now on
+        state.transition(load_error=str(e))
+        automation_ready.set()
+        return
+
+    automation_ready.set()
+    ready_time = time.perf_counter() - STARTUP_TIME
+    logger.info(f"Ready to accept print jobs {ready_time:.2f}s after start")
+    state.transition(ready=True)
 
 
 def prepare_window():
     # activate the window and raise an error if not found
-    windows = pwc.getWindowsWithTitle(
-        config.window_title, condition=pwc.Re.CONTAINS, flags=pwc.Re.IGNORECASE
-    )
+    window = window_tracker.window
     # If no window is found, log available titles to help debugging
-    if not windows:
+    if not window:
         try:
             titles = pwc.getAllTitles()
             logger.error(
@@ -100,33 +233,81 @@ def prepare_window():
             logger.error(f"No window found containing '{config.window_title}'.")
         return False
 
-    window = windows[0]
-    window.activate(wait=True)
+    get_matcher(window)
 
-    # get the window size and position
-    return window.rect
+    # Activation is skipped if the window already has focus
+    return window_tracker.activate()
+
+
+def current_display_scale(window):
+    """Detect the window's display scale; the saved one only without a window"""
+    window_key = config.window_title.lower()
+    saved = load_display_scale(config.data_dir, window_key)
+    if window is None and saved is not None:
+        logger.info(f"Window not found, using saved display scale: {saved}")
+        scale = saved
+    else:
+        # Detected every time, so a scaling change or a move to another monitor
+        # is picked up
+        scale = detect_display_scale(window)
+        if scale != saved:
+            save_display_scale(config.data_dir, window_key, scale)
+            logger.info(f"Detected display scale: {scale}")
+
+    if config.ui_scale:
+        scale = DisplayScale(capture=scale.capture, ui=config.ui_scale)
+    return scale
+
+
+def get_matcher(window):
+    """Return the shared template matcher at the window's current display scale"""
+    global matcher, layout
+
+    scale = current_display_scale(window)
+    if matcher is not None:
+        if scale != matcher.scale:
+            logger.info(f"Display scale changed from {matcher.scale} to {scale}")
+            matcher.set_scale(scale)
+        return matcher
+
+    matcher = Matcher(
+        image_path=config.image_path,
+        scale=scale,
+        stats=MatchStats(config.data_dir),
+        thresholds=load_thresholds(config.data_dir),
+        ring=FrameRing(),
+        budget=budget,
+    )
+    if matcher.bundle is None:
+        logger.warning(
+            "Template bundle missing or stale, decoding the PNGs "
+            "(run build_templates.py)"
+        )
+    layout = LayoutMap(config.data_dir, matcher)
+    return matcher
 
 
 def stop_print():
     window_rect = prepare_window()
 
     prepare_msg = f"Stopping"
-    print(prepare_msg)
     logger.info(prepare_msg)
 
     if not window_rect:
         error_msg = f"Could not prepare window"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
     # reset the screen
     stop = Stop(
-        window_rect=window_rect, is_retina=config.retina, image_path=config.image_path
+        window_tracker=window_tracker,
+        matcher=matcher,
+        layout=layout,
+        settle=settle,
+        watchdog=watchdog,
     )
     if not stop.run():
         error_msg = f"Could not stop"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
@@ -136,175 +317,272 @@ def start_print(
     should_scan_tray=False,
     publish_control_message=None,
     print_type=None,
+    job=None,
+    reuse_setup=False,
 ):
     global stop_print_event
-    global low_ink
-    global current_print_type
 
     window_rect = prepare_window()
 
     if not window_rect:
         error_msg = f"Could not prepare window"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
     prefix = "[12mm] " if canvas_index == 0 else "[16mm] "
 
     prepare_msg = f"{prefix}Preparing eufy Make Studio"
-    print(prepare_msg)
     logger.info(prepare_msg)
 
     # Check for stop signal
     if stop_print_event.is_set():
         if print_type:
-            current_print_type = f"stopping_{print_type}"
+            set_print_type(f"stopping_{print_type}")
         logger.info(f"{prefix}Print stopped during preparation")
         return False
 
     if not window_rect:
         error_msg = f"{prefix}Could not prepare window"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
     # reset the screen
     reset_ui = ResetUIWorkflow(
-        window_rect=window_rect, is_retina=config.retina, image_path=config.image_path
+        window_tracker=window_tracker,
+        matcher=matcher,
+        layout=layout,
+        cancel_event=stop_print_event,
+        settle=settle,
+        watchdog=watchdog,
     )
-    if not reset_ui.run():
+    if not job.step(reset_ui):
         error_msg = f"{prefix}Could not reset the UI"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
     # Check for stop signal
     if stop_print_event.is_set():
         if print_type:
-            current_print_type = f"stopping_{print_type}"
+            set_print_type(f"stopping_{print_type}")
         logger.info(f"{prefix}Print stopped during UI reset")
         return False
 
     # check if printer online
     check_if_online = CheckIfOnline(
-        window_rect=window_rect, is_retina=config.retina, image_path=config.image_path
+        window_tracker=window_tracker,
+        matcher=matcher,
+        layout=layout,
+        cancel_event=stop_print_event,
+        settle=settle,
+        watchdog=watchdog,
     )
-    if not check_if_online.run():
+    if not job.step(check_if_online):
         error_msg = f"{prefix}Printer not online"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
         # Check for stop signal
     if stop_print_event.is_set():
         if print_type:
-            current_print_type = f"stopping_{print_type}"
+            set_print_type(f"stopping_{print_type}")
         return False
 
-    check_if_moisturized = CheckIfShouldMoisturize(window_rect=window_rect)
-    if not check_if_moisturized.run():
-        error_msg = f"{prefix}Printer not moisturized"
-        print(error_msg)
-        logger.error(error_msg)
-        return False
+    # Read idle, low ink and inject ink status with a single machine tab click
+    preflight = MachinePreflight(
+        window_tracker=window_tracker,
+        matcher=matcher,
+        layout=layout,
+        logger=logger,
+        cancel_event=stop_print_event,
+        settle=settle,
+        watchdog=watchdog,
+    )
+    report = job.step(preflight)
+
+    if report.needs_moisturize:
+        moisturize = Moisturize(
+            window_tracker=window_tracker,
+            matcher=matcher,
+            layout=layout,
+            cancel_event=stop_print_event,
+            settle=settle,
+            watchdog=watchdog,
+        )
+        if not job.step(moisturize, report.inject_ink):
+            error_msg = f"{prefix}Printer not moisturized"
+            logger.error(error_msg)
+            return False
+
+        # Idle and ink status change after injecting ink; read them again
+        report = job.step(preflight)
+
+    state.transition(low_ink=report.low_ink)
 
     # Check for stop signal
     if stop_print_event.is_set():
         if print_type:
-            current_print_type = f"stopping_{print_type}"
-        logger.info(f"{prefix}Print stopped during online check")
+            set_print_type(f"stopping_{print_type}")
+        logger.info(f"{prefix}Print stopped during preflight")
         return False
 
     # Make sure the printer is idle
-    check_if_idle = CheckIfIdle(
-        window_rect=window_rect, is_retina=config.retina, image_path=config.image_path
-    )
-    if not check_if_idle.run():
+    if not report.idle:
         error_msg = f"{prefix}Printer not idle"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
-    # Check for stop signal
-    if stop_print_event.is_set():
-        if print_type:
-            current_print_type = f"stopping_{print_type}"
-        logger.info(f"{prefix}Print stopped during idle check")
-        return False
-
-    # Check for low ink
-    check_if_low_ink = CheckIfLowInk(window_rect=window_rect)
-    low_ink = not check_if_low_ink.run()
-
     # Scan the tray
     if should_scan_tray:
         scan_msg = f"{prefix}Scanning the tray"
-        print(scan_msg)
         logger.info(scan_msg)
         scan_tray = ScanTray(
-            window_rect=window_rect,
-            is_retina=config.retina,
-            image_path=config.image_path,
+            window_tracker=window_tracker,
+            matcher=matcher,
+            layout=layout,
+            cancel_event=stop_print_event,
+            settle=settle,
+            watchdog=watchdog,
+            phase_stats=phase_stats,
         )
-        if not scan_tray.run(canvas_index=canvas_index):
+        if not job.step(scan_tray, canvas_index=canvas_index):
             error_msg = f"{prefix}Failed to scan tray"
-            print(error_msg)
             logger.error(error_msg)
             return False
     else:
         select_zeropoint = SelectZeroPointAlignment(
-            window_rect=window_rect,
-            image_path=config.image_path,
-            is_retina=config.retina,
+            window_tracker=window_tracker,
+            matcher=matcher,
+            layout=layout,
+            cancel_event=stop_print_event,
+            settle=settle,
+            watchdog=watchdog,
         )
-        if not select_zeropoint.run(canvas_index=canvas_index):
+        if not job.step(select_zeropoint, canvas_index=canvas_index, reuse=reuse_setup):
             error_msg = f"{prefix}Failed to select zero point alignment"
-            print(error_msg)
             logger.error(error_msg)
             return False
 
     # Check for stop signal
     if stop_print_event.is_set():
         if print_type:
-            current_print_type = f"stopping_{print_type}"
+            set_print_type(f"stopping_{print_type}")
         logger.info(f"{prefix}Print stopped during tray scan")
         return False
 
     # Print
     loggableName = "12mm" if canvas_index == 0 else "16mm"
     start_msg = f"{prefix}Starting {loggableName} print"
-    print(start_msg)
     logger.info(start_msg)
     start_print_workflow = StartPrint(
-        window_rect=window_rect,
+        window_tracker=window_tracker,
         publish_control_message=publish_control_message,
         use_software_start=True,
-        is_retina=config.retina,
-        image_path=config.image_path,
+        matcher=matcher,
+        layout=layout,
         logger=logger,
+        cancel_event=stop_print_event,
+        settle=settle,
+        watchdog=watchdog,
+        phase_stats=phase_stats,
     )
-    if not start_print_workflow.run(canvas_index=canvas_index):
+    if not job.step(
+        start_print_workflow,
+        canvas_index=canvas_index,
+        profile=job_profile(should_scan_tray),
+    ):
         error_msg = f"{prefix}Failed to print"
-        print(error_msg)
         logger.error(error_msg)
         return False
 
     # Check for stop signal
     if stop_print_event.is_set():
         if print_type:
-            current_print_type = f"stopping_{print_type}"
+            set_print_type(f"stopping_{print_type}")
         logger.info(f"{prefix}Print stopped during print execution")
         return False
 
     success_msg = f"{prefix}Print completed successfully"
-    print(success_msg)
     logger.info(success_msg)
     return True
 
 
-def start_print_async(canvas_index, print_type, publish_control_message=None):
-    """Run the print workflow asynchronously"""
-    global current_print_thread, stop_print_event, current_print_type
+def dump_failure(reason, print_type):
+    """Write the recent captures to data/failures for replay_failure.py"""
+    if matcher is None or matcher.ring is None:
+        return
+    try:
+        path = matcher.ring.dump(
+            os.path.join(config.data_dir, "failures"),
+            reason,
+            context={"print_type": print_type, "window_title": config.window_title},
+        )
+        logger.info(f"Saved failure captures to {path}")
+    except Exception as e:
+        logger.error(f"Could not save failure captures: {str(e)}")
+
+
+def recover_hung_app():
+    """Refocus or restart the app after the watchdog declared it hung"""
+    if config.hang_recovery == "refocus":
+        if window_tracker.activate():
+            logger.info("Refocused the app window")
+        return
+    if config.hang_recovery != "restart":
+        return
+
+    try:
+        if window_tracker.terminate():
+            logger.info("Terminated the hung app")
+            time.sleep(APP_EXIT_WAIT)
+        subprocess.Popen([config.app_path])
+    except Exception as e:
+        logger.error(f"Could not restart the app: {str(e)}")
+        return
+
+    deadline = time.monotonic() + APP_START_TIMEOUT
+    while window_tracker.window is None:
+        if time.monotonic() > deadline:
+            logger.error(f"App window did not appear within {APP_START_TIMEOUT}s")
+            return
+        time.sleep(1)
+    logger.info("Restarted the app")
+
+
+def save_profile(profiler, name):
+    """Write a job's profiles and log where the time went"""
+    try:
+        summary = profiler.stop(name)
+    except Exception as e:
+        logger.error(f"Could not save profile {name}: {str(e)}")
+        return
+    logger.info(f"Saved profile {name} ({summary['samples']} samples)")
+    for workflow, categories in summary["workflows"].items():
+        breakdown = ", ".join(f"{k} {v}s" for k, v in categories.items())
+        logger.info(f"Profile {workflow}: {breakdown}")
+
+
+def job_profile(should_scan_tray):
+    return "scan" if should_scan_tray else "zero_point"
+
+
+def start_print_async(
+    canvas_index,
+    print_type,
+    publish_control_message=None,
+    queued_at=None,
+    reuse_setup=False,
+):
+    """Run the print workflow asynchronously.
+
+    reuse_setup: the previous job left this canvas and its alignment selected.
+    """
+    global stop_print_event
+
+    job = None
+    context = None
+    outcome = "error"
+    profiler = None
+    hung = None
 
     # Check if we can acquire the lock (non-blocking)
     if not print_lock.acquire(blocking=False):
@@ -312,86 +590,167 @@ def start_print_async(canvas_index, print_type, publish_control_message=None):
             f"Cannot start {print_type} print - another print job is already running"
         )
         logger.warning(error_msg)
-        print(error_msg)
         return False
 
     try:
-        # Clear any previous stop signal
-        stop_print_event.clear()
-
+        # The actuator has cleared any earlier stop signal before starting us
         # Set current print type for ping system
-        current_print_type = print_type
+        set_print_type(print_type)
 
-        current_print_thread = threading.current_thread()
         start_msg = f"Starting {print_type} print (canvas_index={canvas_index})"
         logger.info(start_msg)
-        print(start_msg)
+
+        # Jobs accepted during startup wait for the GUI stack to finish loading
+        while not automation_ready.wait(1):
+            if stop_print_event.is_set():
+                break
 
         # Check for stop signal before starting
         if stop_print_event.is_set():
             logger.info(f"{print_type} print was stopped before starting")
+            # Nothing was clicked yet, so there is nothing for stop_print to undo
+            set_print_type(False)
             return False
 
-        success = start_print(
-            canvas_index=canvas_index,
-            publish_control_message=publish_control_message,
-            print_type=print_type,
-        )
+        load_error = state.snapshot.load_error
+        if load_error:
+            logger.error(
+                f"Cannot start {print_type} print - GUI automation failed to load: "
+                f"{load_error}"
+            )
+            set_print_type(f"error_{print_type}")
+            return False
+
+        # Only this job's captures should end up in a failure dump
+        if matcher:
+            matcher.ring.clear()
+
+        job = job_history.start_job(print_type, job_profile(False), queued_at)
+        context = bind_log_context(job_id=job.job_id)
+        if config.profile:
+            profiler = JobProfiler(
+                os.path.join(config.data_dir, "profiles"), config.profile_interval
+            )
+            profiler.start()
+        try:
+            success = start_print(
+                canvas_index=canvas_index,
+                publish_control_message=publish_control_message,
+                print_type=print_type,
+                job=job,
+                reuse_setup=reuse_setup,
+            )
+        except WorkflowCancelled as e:
+            # A stop command preempted a workflow mid sleep/poll
+            logger.info(f"{print_type} print cancelled during: {e}")
+            success = False
+        except ApplicationHung as e:
+            hung = str(e)
+            success = False
 
         # Check for stop signal after print attempt
         if stop_print_event.is_set():
+            outcome = "stopped"
             logger.info(f"{print_type} print was stopped")
-            current_print_type = f"stopping_{print_type}"  # Set stopping state
+            set_print_type(f"stopping_{print_type}")  # Set stopping state
             stop_print()  # Call the stop_print function to handle cleanup
-            current_print_type = False  # Reset to idle after stop is complete
+            set_print_type(False)  # Reset to idle after stop is complete
+            return False
+
+        if hung:
+            outcome = "hung"
+            error_msg = f"eufy Make Studio hung during {print_type} print: {hung}"
+            logger.error(error_msg)
+            set_print_type(f"hung_{print_type}")
+            dump_failure(error_msg, print_type)
+            recover_hung_app()
             return False
 
+        outcome = "success" if success else "failed"
         if success:
             success_msg = f"Completed {print_type} print successfully"
             logger.info(success_msg)
-            print(success_msg)
-            current_print_type = False  # Reset to idle on success
+            set_print_type(False)  # Reset to idle on success
         else:
             error_msg = f"Failed to complete {print_type} print"
             logger.error(error_msg)
-            print(error_msg)
-            current_print_type = (
-                f"error_{print_type}"  # Set error state with print type
-            )
+            set_print_type(f"error_{print_type}")  # Set error state with print type
+            dump_failure(error_msg, print_type)
 
         return success
     except Exception as e:
         error_msg = f"Error during {print_type} print: {str(e)}"
         logger.error(error_msg)
-        print(error_msg)
-        current_print_type = (
-            f"error_{print_type}"  # Set error state with print type on exception
-        )
+        set_print_type(
+            f"error_{print_type}"
+        )  # Set error state with print type on exception
+        dump_failure(error_msg, print_type)
         return False
     finally:
-        current_print_thread = None
+        if profiler:
+            save_profile(profiler, f"job-{job.job_id}-{print_type}")
+        if job:
+            job.finish(outcome, low_ink=state.snapshot.low_ink)
+        # Persist the match scores recorded during the job for threshold tuning
+        if matcher:
+            matcher.stats.save()
         print_lock.release()
-        finish_msg = f"{print_type} print thread finished"
-        logger.info(finish_msg)
-        print(finish_msg)
+        logger.info(f"{print_type} print thread finished")
+        if context:
+            reset_log_context(context)
 
 
-async def publish_ping():
-    """Publish regular ping with current print status"""
-    global mqtt_client, mqtt_connected, current_print_type
+def status_fields(snapshot=None):
+    """The reported part of a state snapshot"""
+    snapshot = snapshot or state.snapshot
+    return {
+        "print_running": snapshot.print_type,
+        "ready": snapshot.ready,
+        "load_error": snapshot.load_error,
+        "low_ink": snapshot.low_ink,
+        "version": snapshot.version,
+    }
 
-    if mqtt_client and mqtt_connected:
-        ping_message = {"print_running": current_print_type}
 
-        try:
-            await mqtt_client.publish(
-                config.topic_status, json.dumps(ping_message).encode(), qos=QOS_1
-            )
-        except Exception as e:
-            logger.error(f"Failed to publish ping: {str(e)}")
-            mqtt_connected = False
-            # Trigger reconnection
-            asyncio.create_task(mqtt_reconnect())
+def status_message(snapshot=None):
+    """Build the status payload published on the status topic"""
+    return json.dumps(status_fields(snapshot)).encode()
+
+
+def publish_status(snapshot=None):
+    """Publish the current status; buffered while offline"""
+    if mqtt_supervisor:
+        mqtt_supervisor.publish_threadsafe(
+            config.topic_status, status_message(snapshot)
+        )
+
+
+def on_state_change(old, new):
+    """Publish every transition of the reported fields"""
+    # Connection changes are not reported; a status only arrives when connected
+    if old.mqtt_connected == new.mqtt_connected:
+        # Transitions are buffered while offline and flushed in order on reconnect
+        publish_status(new)
+
+
+def log_first_status(topic):
+    """Log how long after process start the first status reached the broker"""
+    if topic != config.topic_status:
+        return
+    mqtt_supervisor.on_publish = None
+    elapsed = time.perf_counter() - STARTUP_TIME
+    logger.info(f"Time to first status: {elapsed:.2f}s")
+
+
+def set_print_type(print_type):
+    """Update the print state; the transition is published by on_state_change"""
+    state.transition(print_type=print_type)
+
+
+async def publish_ping():
+    """Publish regular ping with current print status"""
+    if mqtt_supervisor:
+        mqtt_supervisor.publish(config.topic_status, status_message(), buffer=False)
 
 
 async def ping_loop():
@@ -399,114 +758,250 @@ async def ping_loop():
     while True:
         try:
             await asyncio.sleep(1)
-            if mqtt_connected:
-                await publish_ping()
+            await publish_ping()
         except Exception as e:
             logger.error(f"Error in ping loop: {str(e)}")
             await asyncio.sleep(1)
 
 
-def publish_control_message(action):
-    """Publish a control message to MQTT"""
-    global mqtt_loop, mqtt_connected
-
-    if mqtt_loop and not mqtt_loop.is_closed() and mqtt_connected:
-        control_message = {"action": action, "timestamp": time.time()}
-
-        # Schedule the async publish on the event loop
+async def metrics_loop(monitor):
+    """Publish the service's own resource usage every METRICS_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
         try:
-            asyncio.run_coroutine_threadsafe(
-                _publish_control_async(control_message), mqtt_loop
+            metrics = monitor.sample()
+            if matcher is not None and matcher.buffers is not None:
+                metrics["frame_buffers_mb"] = round(matcher.buffers.nbytes / 2**20, 1)
+            metrics["timestamp"] = time.time()
+            mqtt_supervisor.publish(
+                config.topic_metrics, json.dumps(metrics).encode(), buffer=False
             )
         except Exception as e:
-            logger.error(f"Failed to schedule control message: {str(e)}")
-    else:
-        logger.warning("MQTT client not connected, cannot publish control message")
+            logger.error(f"Error in metrics loop: {str(e)}")
 
 
-async def _publish_control_async(control_message):
-    """Async helper to publish control message"""
-    global mqtt_client, mqtt_connected
+def publish_control_message(action):
+    """Publish a control message to MQTT"""
+    if not mqtt_supervisor:
+        logger.warning("MQTT client not set up, cannot publish control message")
+        return
 
-    if mqtt_client:
-        try:
-            await mqtt_client.publish(
-                config.topic_control, json.dumps(control_message).encode(), qos=QOS_1
-            )
-            logger.info(f"Published control message: {control_message['action']}")
-        except Exception as e:
-            logger.error(f"Failed to publish control message: {str(e)}")
-            mqtt_connected = False
-            # Trigger reconnection
-            asyncio.create_task(mqtt_reconnect())
+    if not mqtt_supervisor.connected:
+        logger.warning(
+            f"MQTT client not connected, control message '{action}' queued until reconnect"
+        )
+
+    control_message = {"action": action, "timestamp": time.time()}
+    mqtt_supervisor.publish_threadsafe(
+        config.topic_control, json.dumps(control_message).encode()
+    )
+    logger.info(f"Queued control message: {action}")
+
+
+def command_ack(command, accepted, reason=None):
+    """Build the immediate acknowledgement for a command"""
+    snapshot = state.snapshot
+    return {
+        "command": command,
+        "accepted": accepted,
+        "reason": reason,
+        "print_running": snapshot.print_type,
+        # The state right after handling the command, so callers need not
+        # wait for the next ping
+        "state": status_fields(snapshot),
+    }
+
+
+def run_next_job():
+    """Run the pending job the scheduler picks; one actuator command per job"""
+    job = scheduler.next()
+    if job is None:
+        return  # dropped by a stop command, or the queue is held
+    success = start_print_async(
+        job.canvas_index,
+        job.print_type,
+        publish_control_message=publish_control_message,
+        queued_at=job.queued_at,
+        reuse_setup=scheduler.reuses_setup(job),
+    )
+    scheduler.finished(job, success)
+
+    # Leave the printer and the error state alone until someone has looked at
+    # them; clear_error resumes the queue, stop drops it
+    print_type = state.snapshot.print_type
+    if print_type and print_type.startswith(("error_", "hung_")):
+        scheduler.hold(f"{job.print_type} job ended in {print_type}")
+        logger.warning(
+            f"Holding {len(scheduler.pending)} pending print jobs until clear_error "
+            "or stop"
+        )
+
+
+def resume_held_jobs():
+    """Release a held job queue and run its pending jobs; returns their number"""
+    released = scheduler.release()
+    # One actuator command per job; any surplus finds no job and returns
+    for _ in range(released):
+        actuator.enqueue("print job", run_next_job)
+    if released:
+        logger.info(f"Resuming {released} held print jobs")
+    return released
 
 
 def handle_start_print_command(print_type, canvas_index):
     """Handle start print command from MQTT"""
-    # Check if another print is already running
-    if current_print_thread and current_print_thread.is_alive():
-        error_msg = (
-            f"Cannot start {print_type} print - another print job is already running"
-        )
+    command = f"start_{print_type}_print"
+
+    load_error = state.snapshot.load_error
+    if load_error:
+        reason = f"GUI automation failed to load: {load_error}"
+        logger.warning(f"Cannot start {print_type} print - {reason}")
+        return command_ack(command, False, reason)
+
+    # Jobs wait in the scheduler, which decides the order they run in on the
+    # UI actuator
+    accepted, reason = scheduler.add(print_type, canvas_index)
+    if not accepted:
+        error_msg = f"Cannot start {print_type} print - {reason}"
         logger.warning(error_msg)
-        return
-
-    # Start the print job in a separate thread
-    thread = threading.Thread(
-        target=start_print_async,
-        args=(canvas_index, print_type),
-        kwargs={"publish_control_message": publish_control_message},
-        daemon=True,
-    )
-    thread.start()
+        return command_ack(command, False, reason)
+    actuator.enqueue("print job", run_next_job)
 
-    success_msg = f"{print_type} print job started"
+    success_msg = f"{print_type} print job queued"
+    if scheduler.held:
+        success_msg += f", held until clear_error ({scheduler.held})"
     logger.info(success_msg)
+    ack = command_ack(command, True)
+    ack["pending"] = scheduler.pending
+    ack["held"] = scheduler.held
+    return ack
 
 
 def handle_status_command():
     """Handle status request command from MQTT"""
-    is_running = current_print_thread and current_print_thread.is_alive()
-    status_msg = f"Print job running: {is_running}"
+    status_msg = f"Print job running: {actuator.busy}"
     logger.info(status_msg)
+    ack = command_ack("status", True)
+    ack["running"] = actuator.current
+    ack["pending"] = scheduler.pending
+    ack["held"] = scheduler.held
+    return ack
 
 
-def handle_stop_command():
-    """Handle stop command from MQTT"""
-    global stop_print_event, current_print_type
+def is_stopping_or_error(print_type):
+    return bool(print_type) and print_type.startswith(("stopping_", "error_", "hung_"))
+
 
-    if current_print_thread and current_print_thread.is_alive():
-        # Signal the print thread to stop
-        stop_print_event.set()
+def clear_error_state():
+    """Reset an error or stopping state to idle; returns whether there was one"""
+    return (
+        state.update(
+            lambda s: (
+                {"print_type": False} if is_stopping_or_error(s.print_type) else None
+            )
+        )
+        is not None
+    )
+
+
+async def handle_history_command(request):
+    """Handle a job history query; the report runs off the event loop"""
+    try:
+        hours = float(request.get("hours", 24))
+    except (TypeError, ValueError):
+        hours = None
+    if hours is None or not math.isfinite(hours) or hours <= 0:
+        reason = f"invalid hours: {request.get('hours')!r}"
+        logger.warning(f"Rejected history command - {reason}")
+        return command_ack("history", False, reason)
+    loop = asyncio.get_running_loop()
+    ack = command_ack("history", True)
+    ack["history"] = await loop.run_in_executor(None, job_history.report, hours)
+    return ack
 
-        # Call stop_print to handle any immediate UI cleanup
-        stop_print()
 
+def handle_stop_command():
+    """Handle stop command from MQTT"""
+    if actuator.busy:
+        # Wake the print job out of its current sleep/poll. It unwinds on the
+        # actuator thread and runs the Stop workflow there, so the event loop
+        # never blocks on the UI.
+        state.update(
+            lambda s: (
+                {"print_type": f"stopping_{s.print_type}"}
+                if s.print_type and not is_stopping_or_error(s.print_type)
+                else None
+            )
+        )
+        dropped = scheduler.clear()
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} pending print jobs")
+        actuator.preempt()
         logger.info("Print job stop signal sent")
-    else:
-        # If no print is running but we're in error or stopping state, clear it
-        if current_print_type and (
-            current_print_type.startswith("error_")
-            or current_print_type.startswith("stopping_")
-        ):
-            current_print_type = False
-            logger.info("Cleared error/stopping state")
-        else:
-            logger.warning("No print job is currently running")
+        return command_ack("stop", True)
+
+    # If no print is running but we're in error or stopping state, clear it
+    # and drop the jobs held since
+    dropped = scheduler.clear()
+    if dropped:
+        logger.info(f"Dropped {len(dropped)} held print jobs")
+    if clear_error_state() or dropped:
+        logger.info("Cleared error/stopping state")
+        return command_ack("stop", True)
+
+    logger.warning("No print job is currently running")
+    return command_ack("stop", False, "no print job is running")
 
 
 def handle_clear_error_command():
     """Handle clear error command from MQTT"""
-    global current_print_type
-
-    if current_print_type and (
-        current_print_type.startswith("error_")
-        or current_print_type.startswith("stopping_")
-    ):
-        current_print_type = False
+    cleared = clear_error_state()
+    if cleared:
         logger.info("Error/stopping state cleared via command")
-    else:
-        logger.info(f"Current state is '{current_print_type}', no error to clear")
+    # Jobs held since the error run again
+    if resume_held_jobs() or cleared:
+        return command_ack("clear_error", True)
+
+    logger.info(f"Current state is '{state.snapshot.print_type}', no error to clear")
+    return command_ack("clear_error", False, "no error to clear")
+
+
+def publish_ack(ack, request):
+    """Publish a command acknowledgement.
+
+    Requests with a reply_to topic are answered there, otherwise on the ack
+    topic. A correlation_id from the request is echoed back so callers can
+    match the reply to their request.
+    """
+    if not mqtt_supervisor:
+        return
+    if "correlation_id" in request:
+        ack["correlation_id"] = request["correlation_id"]
+    topic = request.get("reply_to") or config.topic_ack
+    mqtt_supervisor.publish(topic, json.dumps(ack).encode())
+
+
+def reply_to_error(request):
+    """Why a request's reply_to topic cannot be answered on, or None"""
+    reply_to = request.get("reply_to")
+    if reply_to is None:
+        return None
+    if not isinstance(reply_to, str) or not reply_to:
+        return "reply_to must be a topic name"
+    # The reply would be received again as a command, sent to the start
+    # button device, or mixed into the status or metrics streams. The ack
+    # topic is where replies go anyway.
+    reserved = (
+        config.topic_command,
+        config.topic_control,
+        config.topic_status,
+        config.topic_metrics,
+    )
+    if reply_to in reserved:
+        return f"reply_to must not be a service topic ({reply_to})"
+    if "+" in reply_to or "#" in reply_to:
+        return "reply_to must not contain wildcards"
+    return None
 
 
 # MQTT async functions for aMQTT
@@ -521,18 +1016,30 @@ async def handle_mqtt_message(topic, payload):
         if topic == config.topic_command:
             command = payload_json.get("command")
 
-            if command == "start_12mm_print":
-                handle_start_print_command("12mm", 0)
+            # Handlers only queue work and return an ack, never block the loop
+            reply_error = reply_to_error(payload_json)
+            if reply_error:
+                logger.warning(f"Rejected {command} command - {reply_error}")
+                ack = command_ack(command, False, reply_error)
+                # Answered on the ack topic instead
+                payload_json = dict(payload_json, reply_to=None)
+            elif command == "start_12mm_print":
+                ack = handle_start_print_command("12mm", 0)
             elif command == "start_16mm_print":
-                handle_start_print_command("16mm", 1)
+                ack = handle_start_print_command("16mm", 1)
             elif command == "status":
-                handle_status_command()
+                ack = handle_status_command()
             elif command == "stop":
-                handle_stop_command()
+                ack = handle_stop_command()
             elif command == "clear_error":
-                handle_clear_error_command()
+                ack = handle_clear_error_command()
+            elif command == "history":
+                ack = await handle_history_command(payload_json)
             else:
                 logger.warning(f"Unknown command: {command}")
+                ack = command_ack(command, False, "unknown command")
+
+            publish_ack(ack, payload_json)
 
     except json.JSONDecodeError:
         logger.error("Failed to decode JSON message")
@@ -540,202 +1047,41 @@ async def handle_mqtt_message(topic, payload):
         logger.error(f"Error processing message: {str(e)}")
 
 
-async def mqtt_reconnect():
-    """Handle MQTT reconnection"""
-    global mqtt_client, mqtt_connected
-
-    if mqtt_connected:
-        return  # Already connected
-
-    logger.info("Attempting to reconnect to MQTT broker...")
-
-    max_retries = 5
-    retry_count = 0
-
-    while retry_count < max_retries and not mqtt_connected:
-        try:
-            await asyncio.sleep(mqtt_reconnect_delay)
-
-            # Close existing client if any
-            if mqtt_client:
-                try:
-                    await mqtt_client.disconnect()
-                except:
-                    pass
-
-            # Create new client and connect
-            mqtt_client = MQTTClient()
-            broker_url = f"mqtt://{config.mqtt_broker}:{config.mqtt_port}"
-            await mqtt_client.connect(broker_url)
-
-            # Wait a moment for session to be properly initialized
-            await asyncio.sleep(0.5)
-
-            # Verify session is properly connected (aMQTT uses transitions state machine)
-            if not mqtt_client.session:
-                raise Exception("Session not initialized after reconnect")
-
-            # Check if session is in connected state using transitions
-            if (
-                hasattr(mqtt_client.session, "is_connected")
-                and not mqtt_client.session.is_connected()
-            ):
-                raise Exception("Session not in connected state after reconnect")
-
-            # Resubscribe to topics
-            await mqtt_client.subscribe([(config.topic_command, QOS_1)])
-
-            mqtt_connected = True
-            logger.info("Successfully reconnected to MQTT broker")
-
-            # Restart message handler
-            asyncio.create_task(mqtt_message_handler())
-            break
-
-        except Exception as e:
-            retry_count += 1
-            logger.error(f"Reconnection attempt {retry_count} failed: {str(e)}")
-            if retry_count >= max_retries:
-                logger.error("Max reconnection attempts reached, giving up")
-                break
-
-
-async def mqtt_message_handler():
-    """Async message handler for aMQTT with reconnection logic"""
-    global mqtt_client, mqtt_connected
-
-    try:
-        while mqtt_connected:
-            try:
-                # Check if client and session are properly initialized
-                if (
-                    not mqtt_client
-                    or not hasattr(mqtt_client, "session")
-                    or not mqtt_client.session
-                ):
-                    logger.warning(
-                        "MQTT client session not initialized, stopping message handler"
-                    )
-                    mqtt_connected = False
-                    asyncio.create_task(mqtt_reconnect())
-                    break
-
-                # Check if session is in connected state using transitions
-                if (
-                    hasattr(mqtt_client.session, "is_connected")
-                    and not mqtt_client.session.is_connected()
-                ):
-                    logger.warning(
-                        "MQTT session not connected, stopping message handler"
-                    )
-                    mqtt_connected = False
-                    asyncio.create_task(mqtt_reconnect())
-                    break
-
-                message = await mqtt_client.deliver_message()
-
-                # Check if message is None (can happen on disconnection/timeout)
-                if message is None:
-                    logger.warning("Received None message, continuing...")
-                    continue
-
-                # Check if message has the expected structure
-                if (
-                    not hasattr(message, "publish_packet")
-                    or message.publish_packet is None
-                ):
-                    logger.warning("Received malformed message")
-                    continue
-
-                packet = message.publish_packet
-
-                # Check if packet has the expected structure
-                if not hasattr(packet, "variable_header") or not hasattr(
-                    packet, "payload"
-                ):
-                    logger.warning("Received packet with missing data")
-                    continue
-
-                topic = packet.variable_header.topic_name
-                payload = packet.payload.data
-
-                # Handle message in background to avoid blocking
-                asyncio.create_task(handle_mqtt_message(topic, payload))
-
-            except Exception as e:
-                logger.error(f"Error receiving MQTT message: {str(e)}")
-                mqtt_connected = False
-                # Trigger reconnection
-                asyncio.create_task(mqtt_reconnect())
-                break
-
-    except Exception as e:
-        logger.error(f"Error in MQTT message handler: {str(e)}")
-        mqtt_connected = False
-        # Trigger reconnection
-        asyncio.create_task(mqtt_reconnect())
-
-
-async def setup_mqtt_async():
-    """Setup aMQTT client and connect to broker"""
-    global mqtt_client, mqtt_connected
-
-    try:
-        mqtt_client = MQTTClient()
-
-        broker_url = f"mqtt://{config.mqtt_broker}:{config.mqtt_port}"
-        logger.info(f"Connecting to MQTT broker at {broker_url}")
-
-        await mqtt_client.connect(broker_url)
-
-        # Wait a moment for session to be properly initialized
-        await asyncio.sleep(0.5)
-
-        # Verify session is properly connected (aMQTT uses transitions state machine)
-        if not mqtt_client.session:
-            raise Exception("Session not initialized after connect")
-
-        # Check if session is in connected state using transitions
-        if (
-            hasattr(mqtt_client.session, "is_connected")
-            and not mqtt_client.session.is_connected()
-        ):
-            raise Exception("Session not in connected state")
-
-        mqtt_connected = True
-        logger.info("Connected to MQTT broker")
-
-        # Subscribe to command topic
-        await mqtt_client.subscribe([(config.topic_command, QOS_1)])
-        logger.info(f"Subscribed to {config.topic_command}")
-
-        # Start message handler and ping loop
-        asyncio.create_task(mqtt_message_handler())
-        asyncio.create_task(ping_loop())
-
-        return True
-
-    except Exception as e:
-        logger.error(f"Failed to connect to MQTT broker: {str(e)}")
-        mqtt_connected = False
-        # Schedule reconnection attempt
-        asyncio.create_task(mqtt_reconnect())
-        return False
-
-
 def setup_mqtt():
-    """Setup MQTT client and start async loop"""
-    global mqtt_loop
+    """Setup the MQTT supervisor and start the async loop"""
+    global mqtt_loop, mqtt_supervisor
 
     # Create new event loop for MQTT
     mqtt_loop = asyncio.new_event_loop()
+    mqtt_supervisor = MQTTSupervisor(
+        broker_url=f"mqtt://{config.mqtt_broker}:{config.mqtt_port}",
+        subscriptions=[(config.topic_command, QOS_1)],
+        on_message=handle_mqtt_message,
+    )
+    mqtt_supervisor.on_publish = log_first_status
+    mqtt_supervisor.on_connection_change = lambda connected: state.transition(
+        mqtt_connected=connected
+    )
+    state.subscribe(on_state_change)
+
+    # Queued now, sent as soon as the first connection is up
+    publish_status()
 
     def run_mqtt_loop():
         asyncio.set_event_loop(mqtt_loop)
         try:
-            mqtt_loop.run_until_complete(setup_mqtt_async())
-            # Start periodic connection check
-            mqtt_loop.create_task(mqtt_keepalive())
+            if config.start_broker:
+                # Listening before the client's first connection attempt
+                try:
+                    mqtt_loop.run_until_complete(
+                        start_broker(config.mqtt_port, config.broker_bind)
+                    )
+                except Exception as e:
+                    # e.g. the port is taken by another broker; connect to that
+                    logger.error(f"Could not start embedded MQTT broker: {str(e)}")
+            mqtt_loop.create_task(mqtt_supervisor.run())
+            mqtt_loop.create_task(ping_loop())
+            mqtt_loop.create_task(metrics_loop(ResourceMonitor(budget)))
             mqtt_loop.run_forever()
         except Exception as e:
             logger.error(f"MQTT loop error: {str(e)}")
@@ -746,32 +1092,28 @@ def setup_mqtt():
     mqtt_thread = threading.Thread(target=run_mqtt_loop, daemon=True)
     mqtt_thread.start()
 
-    # Give it a moment to connect
-    time.sleep(2)
-
     return True
 
 
-async def mqtt_keepalive():
-    """Periodic connection check and reconnection if needed"""
-    global mqtt_connected
-
-    while True:
-        try:
-            await asyncio.sleep(5)  # Check every 30 seconds
-
-            if not mqtt_connected:
-                logger.warning("MQTT connection lost, attempting reconnection...")
-                asyncio.create_task(mqtt_reconnect())
-
-        except Exception as e:
-            logger.error(f"Error in MQTT keepalive: {str(e)}")
-
-
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description="Automatic UV Studio MQTT Client")
 
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        choices=["run", "history"],
+        default="run",
+        help="run the client (default), or print the job history report and exit",
+    )
+
+    parser.add_argument(
+        "--hours",
+        type=float,
+        default=24,
+        help="Time window of the history report in hours (default: 24)",
+    )
+
     parser.add_argument(
         "--broker-host",
         default=DEFAULT_MQTT_BROKER,
@@ -798,28 +1140,186 @@ def parse_arguments():
     )
 
     parser.add_argument(
-        "--retina",
+        "--ui-scale",
+        type=float,
+        default=None,
+        help="Override the detected UI scale, e.g. 1.5 for 150%% Windows scaling or 2 for retina (default: auto)",
+    )
+
+    parser.add_argument(
+        "--data-dir",
+        default=DEFAULT_DATA_DIR,
+        help=f"Directory for persisted runtime data (default: {DEFAULT_DATA_DIR})",
+    )
+
+    parser.add_argument(
+        "--max-poll-latency",
+        type=float,
+        default=DEFAULT_MAX_POLL_LATENCY,
+        help=f"Longest interval in seconds between polls while waiting on the printer, i.e. the worst-case completion detection delay (default: {DEFAULT_MAX_POLL_LATENCY:g})",
+    )
+
+    parser.add_argument(
+        "--max-captures-per-second",
+        type=float,
+        default=DEFAULT_MAX_CAPTURES_PER_SECOND,
+        help=f"Screen capture rate limit (default: {DEFAULT_MAX_CAPTURES_PER_SECOND:g})",
+    )
+
+    parser.add_argument(
+        "--max-matches-per-second",
+        type=float,
+        default=DEFAULT_MAX_MATCHES_PER_SECOND,
+        help=f"Template match rate limit (default: {DEFAULT_MAX_MATCHES_PER_SECOND:g})",
+    )
+
+    parser.add_argument(
+        "--max-cpu",
+        type=float,
+        default=None,
+        help="CPU usage in percent of one core above which polling slows down (default: no limit; needs psutil)",
+    )
+
+    parser.add_argument(
+        "--priority",
+        choices=PRIORITIES,
+        default="normal",
+        help="Process priority, e.g. below_normal to leave CPU to the app (default: normal; needs psutil)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile every print job; writes .pstats, .collapsed (flamegraph) and .json summaries to <data-dir>/profiles",
+    )
+
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=DEFAULT_PROFILE_INTERVAL,
+        help=f"Stack sampling interval in seconds for --profile (default: {DEFAULT_PROFILE_INTERVAL:g})",
+    )
+
+    parser.add_argument(
+        "--settle",
+        action="store_true",
+        help="After a click, continue as soon as the UI has settled instead of sleeping 2 s",
+    )
+
+    parser.add_argument(
+        "--settle-time",
+        type=float,
+        default=DEFAULT_SETTLE_TIME,
+        help=f"Seconds the window must stay unchanged to count as settled (default: {DEFAULT_SETTLE_TIME:g})",
+    )
+
+    parser.add_argument(
+        "--log-format",
+        choices=("text", "json"),
+        default="text",
+        help="Console log format; json writes one object per line with job_id and step (default: text)",
+    )
+
+    parser.add_argument(
+        "--log-file",
+        help="Also write JSON log lines to this file, rotated at 5 MB with 3 backups",
+    )
+
+    parser.add_argument(
+        "--hang-timeout",
+        type=float,
+        default=None,
+        help="End a job as hung once the app window has not changed for this many seconds while waiting (default: off)",
+    )
+
+    parser.add_argument(
+        "--hang-recovery",
+        choices=HANG_RECOVERIES,
+        default="none",
+        help="What to do with a hung app: refocus its window, or terminate and restart it (needs --app-path) (default: none)",
+    )
+
+    parser.add_argument(
+        "--app-path",
+        help="eufy Make Studio executable, started again by --hang-recovery restart",
+    )
+
+    parser.add_argument(
+        "--start-broker",
         action="store_true",
-        default=DEFAULT_RETINA,
-        help="Use retina mode (default: True)",
+        help="Start an embedded MQTT broker on --broker-port in this process and connect to it",
     )
 
     parser.add_argument(
-        "--no-retina",
-        action="store_false",
-        dest="retina",
-        help="Use non-retina mode",
+        "--broker-only",
+        action="store_true",
+        help="Only run the embedded MQTT broker (no UV Studio client)",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--broker-bind",
+        default=DEFAULT_BIND_HOST,
+        help=f"Interface the embedded broker listens on (default: {DEFAULT_BIND_HOST})",
+    )
+
+    parser.add_argument(
+        "--fairness-window",
+        type=float,
+        default=DEFAULT_FAIRNESS_WINDOW,
+        help=f"Longest time in seconds a pending job waits while jobs for the selected canvas go first; 0 runs jobs in arrival order (default: {DEFAULT_FAIRNESS_WINDOW:g})",
+    )
+
+    args = parser.parse_args()
+    if args.hang_recovery == "restart" and not args.app_path:
+        parser.error("--hang-recovery restart needs --app-path")
+    return args
+
+
+def print_history(report):
+    """Print a job history report in readable form"""
+    print(
+        f"Last {report['hours']:g}h: {report['jobs']} jobs "
+        f"({report['jobs_per_hour']} per hour), outcomes {report['outcomes']}, "
+        f"{report['low_ink_jobs']} with low ink"
+    )
+    print(f"Median preflight overhead: {report['median_preflight_s']} s")
+    gaps = report["idle_gaps"]
+    print(
+        f"Idle gaps between jobs: {gaps['count']}, median {gaps['median_s']} s, "
+        f"max {gaps['max_s']} s, total {gaps['total_s']} s"
+    )
+    for workflow, step in report["steps"].items():
+        print(
+            f"  {workflow}: {step['runs']} runs, {step['failures']} failures "
+            f"({step['failure_rate']:.1%}), {step['polls']} polls"
+        )
+    scheduling = report["scheduling"]
+    print(
+        f"Canvas switches: {scheduling['canvas_switches']} "
+        f"(FIFO order: {scheduling['fifo_canvas_switches']}), "
+        f"{scheduling['reordered']} jobs run ahead of earlier ones, "
+        f"{scheduling['switch_cost_s']} s per switch, "
+        f"{scheduling['saved_s']} s saved"
+    )
+    waits = report["click_waits"]
+    print(
+        f"Waits after clicks: {waits['clicks']} clicks, {waits['waited_s']} s "
+        f"waited, {waits['saved_s']} s saved over fixed sleeps"
+    )
+    for label, wait in waits["labels"].items():
+        print(
+            f"  {label}: {wait['clicks']} clicks, median {wait['median_s']} s, "
+            f"ended {wait['ended']}"
+        )
 
 
 def main():
     """Main entry point"""
-    global config, mqtt_client, mqtt_loop
+    global config, budget, job_history, scheduler
 
     # Parse command line arguments
     args = parse_arguments()
+    setup_logging(args)
 
     # Update configuration with CLI arguments
     config = Config(
@@ -827,23 +1327,66 @@ def main():
         broker_port=args.broker_port,
         topic_prefix=args.topic_prefix,
         window_title=args.window_title,
-        retina=args.retina,
+        ui_scale=args.ui_scale,
+        data_dir=args.data_dir,
+        max_poll_latency=args.max_poll_latency,
+        max_captures_per_second=args.max_captures_per_second,
+        max_matches_per_second=args.max_matches_per_second,
+        max_cpu_percent=args.max_cpu,
+        priority=args.priority,
+        profile=args.profile,
+        profile_interval=args.profile_interval,
+        start_broker=args.start_broker,
+        broker_bind=args.broker_bind,
+        settle=args.settle,
+        settle_time=args.settle_time,
+        hang_timeout=args.hang_timeout,
+        hang_recovery=args.hang_recovery,
+        app_path=args.app_path,
+        fairness_window=args.fairness_window,
     )
+    budget = DetectionBudget(
+        max_captures_per_second=config.max_captures_per_second,
+        max_matches_per_second=config.max_matches_per_second,
+        max_cpu_percent=config.max_cpu_percent,
+    )
+    if args.broker_only:
+        logger.info(f"Running the embedded MQTT broker only (port {config.mqtt_port})")
+        run_broker_forever(config.mqtt_port, config.broker_bind)
+        return
+
+    job_history = JobHistory(config.data_dir)
+    scheduler = JobScheduler(config.fairness_window)
+
+    if args.mode == "history":
+        print_history(job_history.report(args.hours))
+        return
+
+    if set_priority(config.priority) and config.priority != "normal":
+        logger.info(f"Running at {config.priority} priority")
+    if config.max_cpu_percent and psutil is None:
+        logger.warning(
+            "psutil is not installed; --max-cpu measures the CPU time of this "
+            "process with time.process_time() instead (uv add psutil)"
+        )
 
     logger.info("Starting automatic-uv-studio MQTT client...")
     logger.info(
-        f"Configuration: broker={config.mqtt_broker}:{config.mqtt_port}, prefix={config.topic_prefix}, window_title~='{config.window_title}', retina={config.retina}, images={config.image_path}"
+        f"Configuration: broker={config.mqtt_broker}:{config.mqtt_port}, prefix={config.topic_prefix}, window_title~='{config.window_title}', ui_scale={config.ui_scale or 'auto'}, images={config.image_path}"
     )
 
+    # All UI work runs on the actuator thread
+    actuator.start()
+
     # Setup MQTT connection
     if not setup_mqtt():
         logger.error("Failed to setup MQTT connection. Exiting.")
         return
 
-    logger.info("UV Studio MQTT client is running. Waiting for commands...")
+    # Load the GUI/CV stack while MQTT connects; status reports ready when done
+    threading.Thread(target=load_automation, name="warm-up", daemon=True).start()
 
-    # Give MQTT time to connect and send initial status
-    time.sleep(3)
+    logger.info("UV Studio MQTT client is running. Waiting for commands...")
 
     try:
         # Keep the main thread alive
@@ -852,11 +1395,14 @@ def main():
     except KeyboardInterrupt:
         logger.info("Shutting down...")
 
+        if matcher:
+            matcher.stats.save()
+
         # Cleanup MQTT
         if mqtt_loop and not mqtt_loop.is_closed():
-            if mqtt_client:
+            if mqtt_supervisor:
                 # Schedule disconnect on the MQTT loop
-                asyncio.run_coroutine_threadsafe(mqtt_client.disconnect(), mqtt_loop)
+                asyncio.run_coroutine_threadsafe(mqtt_supervisor.stop(), mqtt_loop)
             mqtt_loop.call_soon_threadsafe(mqtt_loop.stop)
 
         time.sleep(1)  # Give time for cleanup
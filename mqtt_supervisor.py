@@ -0,0 +1,222 @@
+import asyncio
+import collections
+import logging
+import random
+
+from amqtt.client import MQTTClient
+from amqtt.mqtt.constants import QOS_1
+
+logger = logging.getLogger(__name__)
+
+# Reconnect backoff: the delay doubles on every failed attempt up to the cap,
+# and a random jitter keeps several controllers from reconnecting in lockstep.
+DEFAULT_BACKOFF_INITIAL = 1.0  # seconds
+DEFAULT_BACKOFF_MAX = 60.0  # seconds
+DEFAULT_OUTBOX_SIZE = 256  # messages kept while offline
+DELIVER_TIMEOUT = 5  # seconds between session health checks when idle
+
+
+class MQTTSupervisor:
+    """Owns the MQTT client lifecycle: connect, subscribe, receive and publish.
+
+    There is exactly one supervisor task per process. It is the only place
+    that creates or tears down the client, so reconnect attempts can never
+    overlap. Outbound messages go through a bounded outbox that is flushed in
+    order whenever a connection is up.
+    """
+
+    def __init__(
+        self,
+        broker_url,
+        subscriptions,
+        on_message,
+        backoff_initial=DEFAULT_BACKOFF_INITIAL,
+        backoff_max=DEFAULT_BACKOFF_MAX,
+        outbox_size=DEFAULT_OUTBOX_SIZE,
+    ):
+        self.broker_url = broker_url
+        self.subscriptions = subscriptions  # [(topic, qos), ...]
+        self.on_message = on_message  # async callable(topic, payload)
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.on_publish = None  # optional callable(topic) after each publish
+        self.on_connection_change = None  # optional callable(connected)
+        self.client = None
+        self.connected = False
+        self.loop = None
+        self._outbox = collections.deque(maxlen=outbox_size)
+        self._outbox_ready = None
+        self._stopping = False
+        self._message_tasks = set()
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with jitter for the given (1-based) attempt"""
+        delay = min(self.backoff_max, self.backoff_initial * (2 ** (attempt - 1)))
+        # "Equal jitter": keep half the delay, randomize the other half
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def run(self):
+        """Connect and keep the connection alive until stop() is called"""
+        self.loop = asyncio.get_running_loop()
+        self._outbox_ready = asyncio.Event()
+        if self._outbox:
+            self._outbox_ready.set()
+
+        attempt = 0
+        while not self._stopping:
+            try:
+                await self._connect()
+            except Exception as e:
+                await self._close_client()
+                attempt += 1
+                delay = self.backoff_delay(attempt)
+                logger.error(
+                    f"MQTT connection attempt {attempt} failed: {str(e)} "
+                    f"(retrying in {delay:.1f}s)"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            attempt = 0
+            self._set_connected(True)
+            logger.info(f"Connected to MQTT broker at {self.broker_url}")
+
+            try:
+                await self._serve()
+            except Exception as e:
+                logger.error(f"MQTT connection lost: {str(e)}")
+            finally:
+                self._set_connected(False)
+                await self._close_client()
+
+    async def stop(self):
+        """Disconnect and end the supervisor loop"""
+        self._stopping = True
+        self._set_connected(False)
+        await self._close_client()
+
+    def _set_connected(self, connected):
+        self.connected = connected
+        if self.on_connection_change:
+            self.on_connection_change(connected)
+
+    def publish(self, topic, payload, qos=QOS_1, buffer=True):
+        """Queue a message for publishing; must be called on the MQTT loop.
+
+        Messages with buffer=False (e.g. periodic pings) are dropped instead of
+        queued while offline, since a stale copy is worthless after reconnect.
+        Returns False if the message was dropped.
+        """
+        if not buffer and not self.connected:
+            return False
+        if len(self._outbox) == self._outbox.maxlen:
+            logger.warning("MQTT outbox full, dropping oldest message")
+        self._outbox.append((topic, payload, qos))
+        if self._outbox_ready:
+            self._outbox_ready.set()
+        return True
+
+    def publish_threadsafe(self, topic, payload, qos=QOS_1, buffer=True):
+        """Queue a message for publishing from any thread"""
+        if self.loop is None or self.loop.is_closed():
+            # The loop is not running yet; the outbox is flushed once it is
+            self._outbox.append((topic, payload, qos))
+            return True
+        self.loop.call_soon_threadsafe(self.publish, topic, payload, qos, buffer)
+        return True
+
+    async def _connect(self):
+        self.client = MQTTClient(config={"auto_reconnect": False})
+        logger.info(f"Connecting to MQTT broker at {self.broker_url}")
+        await self.client.connect(self.broker_url)
+
+        if not self._session_connected():
+            raise ConnectionError("Session not in connected state after connect")
+
+        await self.client.subscribe(self.subscriptions)
+        for topic, _ in self.subscriptions:
+            logger.info(f"Subscribed to {topic}")
+
+    async def _close_client(self):
+        client, self.client = self.client, None
+        if client is None:
+            return
+        try:
+            await client.disconnect()
+        except Exception:
+            pass
+
+    def _session_connected(self):
+        session = self.client.session if self.client else None
+        if session is None:
+            return False
+        return session.transitions.is_connected()
+
+    async def _serve(self):
+        """Run the receive and send loops until either of them fails"""
+        tasks = {
+            asyncio.create_task(self._receive_loop()),
+            asyncio.create_task(self._send_loop()),
+        }
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for task in done:
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+
+    async def _send_loop(self):
+        while True:
+            while self._outbox:
+                topic, payload, qos = self._outbox[0]
+                await self.client.publish(topic, payload, qos=qos)
+                # Only drop the message once the broker accepted it, so a
+                # failed publish is retried first after reconnecting
+                if self._outbox and self._outbox[0] == (topic, payload, qos):
+                    self._outbox.popleft()
+                if self.on_publish:
+                    self.on_publish(topic)
+            self._outbox_ready.clear()
+            await self._outbox_ready.wait()
+
+    async def _receive_loop(self):
+        while not self._stopping:
+            if not self._session_connected():
+                raise ConnectionError("MQTT session not connected")
+
+            try:
+                message = await self.client.deliver_message(
+                    timeout_duration=DELIVER_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                continue
+            except asyncio.CancelledError:
+                # The client cancels pending deliveries when the connection
+                # drops; only propagate if this task itself is being cancelled
+                if asyncio.current_task().cancelling():
+                    raise
+                raise ConnectionError("Connection closed by broker")
+
+            # Check if message has the expected structure
+            if message is None:
+                continue
+            packet = getattr(message, "publish_packet", None)
+            if (
+                packet is None
+                or packet.variable_header is None
+                or packet.payload is None
+            ):
+                logger.warning("Received malformed message")
+                continue
+
+            topic = packet.variable_header.topic_name
+            payload = packet.payload.data
+
+            # Handle message in background to avoid blocking
+            task = asyncio.create_task(self.on_message(topic, payload))
+            self._message_tasks.add(task)
+            task.add_done_callback(self._message_tasks.discard)
@@ -0,0 +1,129 @@
+"""Send commands to the UV Studio service and measure the round trip.
+
+Each command is sent with a reply_to topic and a correlation_id; the
+service answers on reply_to right away with an acknowledgement and its
+current state. The client prints the reply and the round-trip time.
+
+    python mqtt_test_client.py status
+    python mqtt_test_client.py start_12mm_print --broker-host 192.168.1.100
+    python mqtt_test_client.py status --count 100     # latency statistics
+    python mqtt_test_client.py listen                 # print all service messages
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from amqtt.client import MQTTClient
+from amqtt.mqtt.constants import QOS_1
+
+COMMANDS = (
+    "start_12mm_print",
+    "start_16mm_print",
+    "status",
+    "stop",
+    "clear_error",
+    "history",
+)
+
+
+async def request(client, args, reply_topic, command):
+    """Send one command and wait for its reply; returns (reply, seconds)"""
+    correlation_id = uuid.uuid4().hex
+    message = {
+        "command": command,
+        "reply_to": reply_topic,
+        "correlation_id": correlation_id,
+    }
+    started = time.perf_counter()
+    await client.publish(
+        f"{args.topic_prefix}/command", json.dumps(message).encode(), qos=QOS_1
+    )
+
+    deadline = started + args.timeout
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return None, None
+        try:
+            delivered = await client.deliver_message(timeout_duration=remaining)
+        except asyncio.TimeoutError:
+            return None, None
+        reply = json.loads(delivered.publish_packet.payload.data.decode())
+        # Ignore late replies to earlier, timed out requests
+        if reply.get("correlation_id") == correlation_id:
+            return reply, time.perf_counter() - started
+
+
+async def send(args):
+    client = MQTTClient(config={"auto_reconnect": False})
+    await client.connect(f"mqtt://{args.broker_host}:{args.broker_port}")
+    reply_topic = f"{args.topic_prefix}/reply/{uuid.uuid4().hex[:12]}"
+    await client.subscribe([(reply_topic, QOS_1)])
+
+    latencies = []
+    try:
+        for _ in range(args.count):
+            reply, elapsed = await request(client, args, reply_topic, args.command)
+            if reply is None:
+                print(f"No reply within {args.timeout}s")
+                continue
+            latencies.append(elapsed)
+            if args.count == 1:
+                print(json.dumps(reply, indent=2))
+            print(f"Round trip: {elapsed * 1000:.1f} ms")
+    finally:
+        await client.disconnect()
+
+    if len(latencies) > 1:
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(
+            f"{len(latencies)}/{args.count} replies: "
+            f"median {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms"
+        )
+
+
+async def listen(args):
+    client = MQTTClient()
+    await client.connect(f"mqtt://{args.broker_host}:{args.broker_port}")
+    await client.subscribe([(f"{args.topic_prefix}/#", QOS_1)])
+    print(f"Listening on {args.topic_prefix}/# (Ctrl+C to stop)")
+    try:
+        while True:
+            delivered = await client.deliver_message()
+            payload = delivered.publish_packet.payload.data.decode()
+            print(f"{delivered.topic}: {payload}")
+    finally:
+        await client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=COMMANDS + ("listen",))
+    parser.add_argument("--broker-host", default="localhost")
+    parser.add_argument("--broker-port", type=int, default=1883)
+    parser.add_argument("--topic-prefix", default="uv_studio")
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        help="Send the command this many times and report latency statistics",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="Seconds to wait for each reply"
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(listen(args) if args.command == "listen" else send(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import cProfile
+import collections
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.01  # seconds between stack samples
+WORKFLOWS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workflows")
+# Threads sampled besides the one running the job
+SAMPLED_THREAD_PREFIXES = ("matcher",)
+# Stack frame helpers that are not workflows themselves
+NOT_WORKFLOWS = ("Workflow", "Matcher", "Frame", "LayoutMap", "FrameRing")
+
+
+def categorize(stack):
+    """Hot path a sampled stack (outermost frame first) is spending time in"""
+    qualnames = {code.co_qualname for code in stack}
+    filenames = [code.co_filename for code in stack]
+    if any("pyscreeze" in name for name in filenames):
+        return "capture"
+    if any(f"{os.sep}PIL{os.sep}" in name for name in filenames):
+        return "pil_conversion"
+    if qualnames & {"Matcher.score", "Matcher.template", "Frame.view", "preprocess"}:
+        return "opencv_match"
+    if "Matcher.grab" in qualnames:
+        # Converting the screenshot to a BGR array after the capture itself
+        return "pil_conversion"
+    if "Workflow.sleep" in qualnames or any("pyautogui" in name for name in filenames):
+        # pyautogui itself only sleeps here (clicks are instant)
+        return "sleep"
+    if any("amqtt" in name or "mqtt_supervisor" in name for name in filenames):
+        return "mqtt_publish"
+    return "other"
+
+
+def workflow_of(stack):
+    """Name of the outermost workflow class in a stack, or None"""
+    for code in stack:
+        if code.co_filename.startswith(WORKFLOWS_DIR) and "." in code.co_qualname:
+            name = code.co_qualname.split(".")[0]
+            if name not in NOT_WORKFLOWS:
+                return name
+    return None
+
+
+class JobProfiler:
+    """Profiles one print job on the thread that runs it.
+
+    Two profiles are taken at once. cProfile records every Python call
+    (on Python 3.12+ in all threads, so MQTT publishing on the event loop is
+    included), and is written as a .pstats file. A sampler thread
+    records the stacks of the job thread and the matcher pool every
+    `interval` seconds. It writes a .collapsed file (one "frame;frame;frame
+    count" line per stack, the input of flamegraph.pl and speedscope) and
+    a .json summary of time per workflow and hot path: capture, PIL
+    conversion, OpenCV matching, sleep and MQTT publishing.
+    """
+
+    def __init__(self, directory, interval=DEFAULT_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._profile = cProfile.Profile()
+        self._stacks = collections.Counter()
+        self._breakdown = collections.defaultdict(collections.Counter)
+        self._samples = 0
+        self._stopping = threading.Event()
+        self._sampler = None
+        self._thread_id = None
+        self._started = None
+
+    def start(self):
+        """Start profiling the calling thread"""
+        self._thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="profiler", daemon=True
+        )
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self, name):
+        """Stop profiling and write the profiles; returns the summary"""
+        self._profile.disable()
+        self._stopping.set()
+        self._sampler.join()
+        duration = time.perf_counter() - self._started
+
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, name)
+        self._profile.dump_stats(f"{base}.pstats")
+        with open(f"{base}.collapsed", "w") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            "name": name,
+            "duration_s": round(duration, 2),
+            "samples": self._samples,
+            "interval_s": self.interval,
+            "workflows": {
+                workflow: {
+                    category: round(count * self.interval, 2)
+                    for category, count in categories.most_common()
+                }
+                for workflow, categories in self._breakdown.items()
+            },
+        }
+        with open(f"{base}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def _sample_loop(self):
+        while not self._stopping.wait(self.interval):
+            frames = sys._current_frames()
+            job_stack = self._stack(frames.get(self._thread_id))
+            workflow = workflow_of(job_stack) or "(job)"
+            self._record("job", workflow, job_stack)
+
+            # Matcher pool threads work for the job's current workflow
+            for thread in threading.enumerate():
+                if not thread.name.startswith(SAMPLED_THREAD_PREFIXES):
+                    continue
+                stack = self._stack(frames.get(thread.ident))
+                # Skip idle workers waiting for work
+                if any(code.co_filename.endswith("matcher.py") for code in stack):
+                    self._record(thread.name, workflow, stack)
+
+    def _record(self, thread_name, workflow, stack):
+        if not stack:
+            return
+        self._samples += 1
+        self._breakdown[workflow][categorize(stack)] += 1
+        labels = [thread_name] + [self._label(code) for code in stack]
+        self._stacks[";".join(labels)] += 1
+
+    @staticmethod
+    def _stack(frame):
+        """Code objects of a frame's stack, outermost first"""
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    @staticmethod
+    def _label(code):
+        return f"{code.co_qualname} ({os.path.basename(code.co_filename)})"
@@ -0,0 +1,117 @@
+"""Replay a failure dump written by the service to data/failures.
+
+Lists the captures leading up to a failed job with the workflow steps and
+the match scores recorded live, and re-scores the same templates against
+each capture with the current templates and matching modes, so a failure
+can be reproduced and a fix checked offline.
+
+    python replay_failure.py data/failures/failure-20250101-120000.zip
+    python replay_failure.py DUMP --extract frames/    # also save the captures
+    python replay_failure.py DUMP --scores replay.json # for tune_thresholds.py
+    python replay_failure.py DUMP --scores replay.json --modes grayscale
+"""
+
+import argparse
+import json
+import os
+
+import cv2
+
+from workflows.display_scale import DisplayScale
+from workflows.frame_ring import load_dump
+from workflows.match_stats import MatchStats, load_thresholds
+from workflows.matcher import MODES, Frame, Matcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dump", help="Failure dump (.zip)")
+    parser.add_argument(
+        "--images", default="images", help="Template directory (default: images)"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default="data",
+        help="Data directory with thresholds.json (default: data)",
+    )
+    parser.add_argument("--extract", help="Write the captures as PNGs to this folder")
+    parser.add_argument(
+        "--scores",
+        help="Write the replayed scores as a histogram file for tune_thresholds.py",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="*",
+        choices=MODES,
+        default=[],
+        help="Also record each template's scores in these matching modes, "
+        "counted as hit or miss like the replay in its own mode",
+    )
+    args = parser.parse_args()
+
+    manifest, frames = load_dump(args.dump)
+    print(f"Reason: {manifest['reason']}")
+    print(f"Context: {json.dumps(manifest['context'])}")
+    print(f"{len(frames)} captures at {manifest['downscale']}x\n")
+
+    if args.extract:
+        os.makedirs(args.extract, exist_ok=True)
+
+    stats = None
+    if args.scores:
+        stats = MatchStats(os.path.dirname(args.scores) or ".")
+        stats.path = args.scores
+
+    thresholds = load_thresholds(args.data_dir)
+    matchers = {}
+    start = frames[0][0]["time"] if frames else 0
+    for meta, image in frames:
+        # Captures were downscaled before storing, so match at the same reduced
+        # scale; positions then come out in the original click coordinates
+        downscale = manifest["downscale"]
+        scale = DisplayScale(
+            capture=meta["capture_scale"] * downscale,
+            ui=meta["ui_scale"] * downscale,
+        )
+        matcher = matchers.get(scale)
+        if matcher is None:
+            matcher = matchers[scale] = Matcher(
+                args.images, scale, thresholds=thresholds
+            )
+
+        print(f"+{meta['time'] - start:6.1f}s {meta['file']}")
+        frame = Frame(image)
+        for recorded in meta["matches"]:
+            name = recorded["template"]
+            try:
+                score, _ = matcher.score(name, frame)
+            except FileNotFoundError:
+                print(f"    {name}: template missing")
+                continue
+            hit = score >= recorded["confidence"]
+            if stats is not None:
+                mode = matcher.mode(name)
+                stats.record(name, mode, score, hit)
+                for other in set(args.modes) - {mode}:
+                    stats.record(name, other, matcher.score(name, frame, other)[0], hit)
+            print(
+                f"    {name}: live {recorded['score']:.3f} "
+                f"replay {score:.3f} / {recorded['confidence']} "
+                f"{'hit' if hit else 'miss'}"
+            )
+        # Events are attached to the last capture before they happened
+        for event in meta["events"]:
+            print(f"  -- {event}")
+
+        if args.extract:
+            cv2.imwrite(
+                os.path.join(args.extract, meta["file"].replace(".jpg", ".png")), image
+            )
+
+    if stats is not None:
+        stats.save()
+        print(f"\nSaved replayed scores to {args.scores}")
+
+
+if __name__ == "__main__":
+    main()
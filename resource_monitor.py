@@ -0,0 +1,76 @@
+import logging
+import os
+import sys
+import time
+
+try:
+    import psutil
+except ImportError:  # optional; without it CPU comes from time.process_time()
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("normal", "below_normal", "idle")
+# Unix nice values for the priority levels
+NICE_VALUES = {"normal": 0, "below_normal": 10, "idle": 19}
+
+
+class ResourceMonitor:
+    """Samples the service's own CPU and memory usage for the metrics topic.
+
+    Without psutil the CPU usage is the process CPU time from
+    time.process_time() over the wall time since the previous sample, and
+    no memory usage is reported.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget
+        self._process = psutil.Process(os.getpid()) if psutil else None
+        if self._process:
+            # The first cpu_percent() call only starts the measurement
+            self._process.cpu_percent(None)
+        self._cpu_time = time.process_time()
+        self._wall_time = time.monotonic()
+
+    def cpu_percent(self):
+        """CPU usage in percent of one core since the previous call"""
+        if self._process:
+            return self._process.cpu_percent(None)
+        cpu_time, wall_time = time.process_time(), time.monotonic()
+        elapsed = wall_time - self._wall_time
+        used = cpu_time - self._cpu_time
+        self._cpu_time, self._wall_time = cpu_time, wall_time
+        return round(100 * used / elapsed, 1) if elapsed > 0 else 0.0
+
+    def sample(self):
+        """Current usage; CPU is averaged since the previous sample"""
+        metrics = {"cpu_percent": self.cpu_percent()}
+        if self._process:
+            metrics["rss_mb"] = round(self._process.memory_info().rss / 2**20, 1)
+        if self.budget is not None:
+            self.budget.update_cpu(metrics["cpu_percent"])
+            metrics.update(self.budget.snapshot())
+        return metrics
+
+
+def set_priority(level):
+    """Lower the scheduling priority of this process; returns whether it worked"""
+    if level == "normal":
+        return True
+    if psutil is None:
+        logger.warning(f"psutil is not installed, cannot set priority '{level}'")
+        return False
+    try:
+        process = psutil.Process(os.getpid())
+        if sys.platform == "win32":
+            process.nice(
+                psutil.IDLE_PRIORITY_CLASS
+                if level == "idle"
+                else psutil.BELOW_NORMAL_PRIORITY_CLASS
+            )
+        else:
+            process.nice(NICE_VALUES[level])
+    except (psutil.Error, OSError) as e:
+        logger.warning(f"Could not set process priority '{level}': {str(e)}")
+        return False
+    return True
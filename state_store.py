@@ -0,0 +1,85 @@
+import dataclasses
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class ServiceState:
+    """Immutable snapshot of the service state"""
+
+    # False, '12mm', '16mm', 'stopping_12mm', 'stopping_16mm', 'error_12mm',
+    # 'error_16mm', 'hung_12mm' or 'hung_16mm'
+    print_type: object = False
+    low_ink: bool = False
+    ready: bool = False  # GUI automation loaded, jobs start without delay
+    load_error: object = None  # why the GUI automation failed to load, or None
+    mqtt_connected: bool = False
+    version: int = 0  # incremented on every transition
+
+    def as_dict(self):
+        return dataclasses.asdict(self)
+
+
+class StateStore:
+    """Single owner of the service state shared by the print job, the MQTT loop
+    and the command handlers.
+
+    The state is an immutable ServiceState replaced as a whole on each
+    transition, so readers take a consistent snapshot with a plain attribute
+    read and never lock. Writers go through transition() or update(), which
+    apply the change atomically, bump the version and notify subscribers in
+    order.
+    """
+
+    def __init__(self, state=None):
+        self._state = state or ServiceState()
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    @property
+    def snapshot(self):
+        """The current state; safe to read from any thread without locking"""
+        return self._state
+
+    def transition(self, **changes):
+        """Atomically apply changes; returns the new state, or None if unchanged"""
+        return self.update(lambda state: changes)
+
+    def update(self, func):
+        """Atomically apply the changes func(state) returns (a dict, or None to skip).
+
+        Use this for check-then-set updates that depend on the current state.
+        Subscribers are called on the writer's thread before the next
+        transition can start, so they see transitions in version order; they
+        must not block or start a transition themselves.
+        """
+        with self._lock:
+            old = self._state
+            changes = func(old)
+            if not changes or all(
+                getattr(old, name) == value for name, value in changes.items()
+            ):
+                return None
+            new = dataclasses.replace(old, version=old.version + 1, **changes)
+            self._state = new
+
+            for callback in list(self._subscribers):
+                try:
+                    callback(old, new)
+                except Exception as e:
+                    logger.error(f"State subscriber failed: {str(e)}")
+        return new
+
+    def subscribe(self, callback):
+        """Call callback(old, new) after every transition; returns an unsubscribe function"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
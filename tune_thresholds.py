@@ -0,0 +1,160 @@
+"""Propose per-template match thresholds from recorded match scores.
+
+Reads the score histograms the service records in data/match_scores.json
+(plus any extra histogram files, e.g. from replayed sessions), proposes a
+confidence threshold and matching mode per template and optionally writes
+them to data/thresholds.json, which the service loads on startup.
+
+Scores are kept per matching mode, and a mode is only proposed from
+scores recorded in it: the live service records the mode each template
+is matched in, replay_failure.py --modes records others.
+
+    python tune_thresholds.py                      # print proposals
+    python tune_thresholds.py --write              # save them
+    python tune_thresholds.py --sessions replay.json --write
+"""
+
+import argparse
+import os
+
+from workflows.match_stats import (
+    BINS,
+    SCORES_FILE,
+    load_histograms,
+    load_thresholds,
+    merge_counts,
+    save_thresholds,
+)
+from workflows.matcher import DEFAULT_CONFIDENCE, Matcher
+
+MIN_SAMPLES = 20  # hits and misses needed before proposing anything
+# Ignore this fraction of unusually low hits; a missed match only costs
+# another poll, so unlike near misses they may fall below the threshold
+TAIL = 0.005
+MIN_THRESHOLD = 0.6
+MAX_THRESHOLD = 0.98
+# With this much room between real matches and near misses, the cheaper
+# grayscale matching is safe
+GRAYSCALE_MARGIN = 0.15
+
+
+def quantile(counts, q):
+    """Score at quantile q of a histogram (bin lower edge)"""
+    total = sum(counts)
+    target = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen > target:
+            return index / BINS
+    return (len(counts) - 1) / BINS
+
+
+def highest(counts):
+    """Upper edge of the highest non-empty histogram bin"""
+    return (max(index for index, count in enumerate(counts) if count) + 1) / BINS
+
+
+def separate(counts):
+    """(confidence, margin) separating one mode's hits from its misses, or None"""
+    hits, misses = counts["hit"], counts["miss"]
+    if sum(hits) < MIN_SAMPLES or sum(misses) < MIN_SAMPLES:
+        return None
+
+    # Every near miss counts: a threshold below one would click a wrong match
+    lowest_hit = quantile(hits, TAIL)
+    highest_miss = highest(misses)
+    margin = lowest_hit - highest_miss
+    if margin <= 0:
+        # Real matches and near misses overlap; no threshold separates them
+        return None
+
+    confidence = round(highest_miss + margin / 2, 3)
+    confidence = min(MAX_THRESHOLD, max(MIN_THRESHOLD, confidence))
+    return confidence, round(margin, 3)
+
+
+def propose(histograms, mode):
+    """Proposed (confidence, mode, margin) for one template, or None.
+
+    histograms holds the template's counts per matching mode and mode is
+    the one it is matched in now. Grayscale is proposed when its own
+    scores leave GRAYSCALE_MARGIN between real matches and near misses.
+    """
+    if "grayscale" in histograms:
+        proposal = separate(histograms["grayscale"])
+        if proposal is not None and proposal[1] >= GRAYSCALE_MARGIN:
+            return proposal[0], "grayscale", proposal[1]
+    if mode == "grayscale" or mode not in histograms:
+        # Without a usable grayscale proposal, fall back to colour
+        mode = "color"
+    if mode not in histograms:
+        return None
+    proposal = separate(histograms[mode])
+    if proposal is None:
+        return None
+    return proposal[0], mode, proposal[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--data-dir", default="data", help="Service data directory (default: data)"
+    )
+    parser.add_argument(
+        "--images", default="images", help="Template directory (default: images)"
+    )
+    parser.add_argument(
+        "--sessions",
+        nargs="*",
+        default=[],
+        help="Additional score histogram files, e.g. from replayed sessions",
+    )
+    parser.add_argument(
+        "--write", action="store_true", help="Save the proposals to thresholds.json"
+    )
+    args = parser.parse_args()
+
+    histograms = {}
+    for path in [os.path.join(args.data_dir, SCORES_FILE)] + args.sessions:
+        for image_name, modes in load_histograms(path).items():
+            for mode, counts in modes.items():
+                merge_counts(histograms, image_name, mode, counts)
+
+    if not histograms:
+        print("No recorded match scores found")
+        return
+
+    thresholds = load_thresholds(args.data_dir)
+    # Resolves each template's current mode from thresholds.json and templates.json
+    matcher = Matcher(args.images, thresholds=thresholds)
+    for image_name in sorted(histograms):
+        modes = histograms[image_name]
+        current = thresholds.get(image_name, {}).get("confidence", DEFAULT_CONFIDENCE)
+        current_mode = matcher.mode(image_name)
+        samples = ", ".join(
+            f"{mode} {sum(counts['hit'])} hits/{sum(counts['miss'])} misses"
+            for mode, counts in sorted(modes.items())
+        )
+        proposal = propose(modes, current_mode)
+        if proposal is None:
+            print(
+                f"{image_name}: keeping {current} ({current_mode}; {samples}, "
+                "not enough separated samples)"
+            )
+            continue
+
+        confidence, mode, margin = proposal
+        print(
+            f"{image_name}: {current} ({current_mode}) -> {confidence} ({mode}, "
+            f"margin {margin}; {samples})"
+        )
+        thresholds[image_name] = {"confidence": confidence, "mode": mode}
+
+    if args.write:
+        save_thresholds(args.data_dir, thresholds)
+        print(f"Saved thresholds to {args.data_dir}")
+
+
+if __name__ == "__main__":
+    main()
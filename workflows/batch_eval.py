@@ -0,0 +1,174 @@
+import collections
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .display_scale import DisplayScale
+from .frame_ring import load_dump
+from .matcher import MAX_WORKERS, preprocess
+
+BATCH_BYTES = 64 * 1024 * 1024  # stacked frames matched per matchTemplate call
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# A recorded capture; uid indexes the unique frames, so duplicates share one.
+# labels maps template names to whether the template is really visible
+RecordedFrame = collections.namedtuple(
+    "RecordedFrame", ["source", "name", "time", "uid", "labels"]
+)
+
+
+def frame_hash(image):
+    return hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+
+
+class FrameSequence:
+    """Recorded captures from past jobs, deduplicated for batch evaluation.
+
+    Identical captures (a long wait shows the same screen for minutes) are
+    stored and scored once. Unique frames are grouped by size and display
+    scale, since each group is matched as one stacked array.
+    """
+
+    def __init__(self):
+        self.frames = []
+        self._uids = {}
+        self._groups = collections.defaultdict(list)  # (scale, shape) -> [(uid, image)]
+
+    @property
+    def unique_count(self):
+        return len(self._uids)
+
+    def add(self, image, source, name, time, scale, labels=None):
+        """Add a BGR capture taken at a DisplayScale; returns the RecordedFrame"""
+        key = (scale, image.shape, frame_hash(image))
+        uid = self._uids.get(key)
+        if uid is None:
+            uid = self._uids[key] = len(self._uids)
+            self._groups[(scale, image.shape)].append((uid, image))
+        frame = RecordedFrame(source, name, time, uid, labels or {})
+        self.frames.append(frame)
+        return frame
+
+    def add_dump(self, path):
+        """Add the captures of a failure dump, labelled with the live decisions"""
+        manifest, frames = load_dump(path)
+        downscale = manifest["downscale"]
+        for meta, image in frames:
+            # Stored captures are downscaled, so match at the same reduced scale
+            scale = DisplayScale(
+                capture=meta["capture_scale"] * downscale,
+                ui=meta["ui_scale"] * downscale,
+            )
+            labels = {
+                match["template"]: match["score"] >= match["confidence"]
+                for match in meta["matches"]
+            }
+            self.add(image, path, meta["file"], meta["time"], scale, labels)
+
+    def add_directory(self, path, scale):
+        """Add every image in a folder (e.g. replay_failure.py --extract output)"""
+        names = sorted(
+            name for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        for index, name in enumerate(names):
+            image = cv2.imread(os.path.join(path, name), cv2.IMREAD_COLOR)
+            if image is not None:
+                self.add(image, path, name, index, scale)
+
+    def batches(self, max_bytes=BATCH_BYTES):
+        """Yield (scale, uids, stacked images) with at most max_bytes per stack"""
+        for (scale, shape), frames in self._groups.items():
+            per_batch = max(1, max_bytes // max(1, int(np.prod(shape))))
+            for start in range(0, len(frames), per_batch):
+                chunk = frames[start : start + per_batch]
+                uids = np.array([uid for uid, _ in chunk])
+                yield scale, uids, np.stack([image for _, image in chunk])
+
+
+def score_stack(matcher, image_name, views):
+    """Best score and (x, y) position of a template in each of a stack of views.
+
+    The views are matched as one tall image with a single matchTemplate call.
+    Result rows whose window would straddle two frames are discarded, so
+    every score equals what Matcher.score returns for that frame alone.
+    """
+    mode = matcher.mode(image_name)
+    template = matcher.template(image_name, mode)
+    count, height, width = views.shape[:3]
+    template_height, template_width = template.shape[:2]
+    if height < template_height or width < template_width:
+        return np.zeros(count, np.float32), np.zeros((count, 2), int)
+
+    mask = matcher.mask(image_name)
+    tall = views.reshape(count * height, *views.shape[2:])
+    result = cv2.matchTemplate(tall, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+
+    # Give every frame `height` result rows, keep the ones inside the frame
+    rows = height - template_height + 1
+    padded = np.zeros((count * height, result.shape[1]), np.float32)
+    padded[: result.shape[0]] = result
+    per_frame = padded.reshape(count, height, -1)[:, :rows].reshape(count, -1)
+    # A flat (zero variance) template or region has no defined score
+    per_frame[~np.isfinite(per_frame)] = 0
+
+    best = per_frame.argmax(axis=1)
+    scores = per_frame[np.arange(count), best]
+    y, x = np.divmod(best, result.shape[1])
+    return scores, np.stack([x, y], axis=1)
+
+
+def evaluate(sequence, matcher_for_scale, image_names, max_bytes=BATCH_BYTES):
+    """Score every template against every unique frame of a sequence.
+
+    matcher_for_scale(scale) returns the Matcher for a display scale. Returns
+    {image_name: scores indexed by frame uid}.
+    """
+    scores = {name: np.zeros(sequence.unique_count, np.float32) for name in image_names}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for scale, uids, images in sequence.batches(max_bytes):
+            matcher = matcher_for_scale(scale)
+            # Preprocess the stack once per mode, frame by frame so filters do
+            # not bleed across frame edges; templates are scored concurrently
+            views = {}
+            for name in image_names:
+                mode = matcher.mode(name)
+                if mode not in views:
+                    views[mode] = np.stack(
+                        [preprocess(image, mode) for image in images]
+                    )
+                matcher.template(name, mode)
+                matcher.mask(name)
+            futures = {
+                name: pool.submit(score_stack, matcher, name, views[matcher.mode(name)])
+                for name in image_names
+            }
+            for name, future in futures.items():
+                scores[name][uids] = future.result()[0]
+    return scores
+
+
+def precision_recall(frames, scores, image_name, threshold):
+    """Counts and rates of a template's decisions against the frame labels.
+
+    Frames without a label for the template are left out.
+    """
+    counts = collections.Counter()
+    for frame in frames:
+        visible = frame.labels.get(image_name)
+        if visible is None:
+            continue
+        hit = scores[frame.uid] >= threshold
+        counts[("t" if hit == visible else "f") + ("p" if hit else "n")] += 1
+
+    tp, fp, fn = counts["tp"], counts["fp"], counts["fn"]
+    return {
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "tn": counts["tn"],
+        "precision": tp / (tp + fp) if tp + fp else None,
+        "recall": tp / (tp + fn) if tp + fn else None,
+    }
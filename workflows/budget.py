@@ -0,0 +1,74 @@
+import threading
+import time
+
+DEFAULT_MAX_CAPTURES_PER_SECOND = 2.0
+DEFAULT_MAX_MATCHES_PER_SECOND = 20.0
+# Poll intervals are stretched by up to this factor while over the CPU budget
+MAX_POLL_FACTOR = 4.0
+
+
+class RateLimiter:
+    """Spaces out events to at most `rate` per second, blocking the caller"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.count = 0
+        self.throttled = 0  # events that had to wait
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+            self.count += 1
+            if slot > now:
+                self.throttled += 1
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DetectionBudget:
+    """CPU budget for screen capture and template matching.
+
+    Hard limits on captures and matches per second keep a burst of lookups
+    from competing with the app for CPU. On top of that, when the measured
+    CPU usage of the service exceeds max_cpu_percent, poll_factor grows so
+    that long waits poll less often; it shrinks back once usage is below it.
+    """
+
+    def __init__(
+        self,
+        max_captures_per_second=DEFAULT_MAX_CAPTURES_PER_SECOND,
+        max_matches_per_second=DEFAULT_MAX_MATCHES_PER_SECOND,
+        max_cpu_percent=None,
+    ):
+        self.captures = RateLimiter(max_captures_per_second)
+        self.matches = RateLimiter(max_matches_per_second)
+        self.max_cpu_percent = max_cpu_percent
+        self.poll_factor = 1.0
+
+    def acquire_capture(self):
+        self.captures.acquire()
+
+    def acquire_match(self):
+        self.matches.acquire()
+
+    def update_cpu(self, cpu_percent):
+        """Adjust poll_factor from a CPU usage sample (percent of one core)"""
+        if not self.max_cpu_percent or cpu_percent is None:
+            return
+        if cpu_percent > self.max_cpu_percent:
+            self.poll_factor = min(MAX_POLL_FACTOR, self.poll_factor * 1.5)
+        else:
+            self.poll_factor = max(1.0, self.poll_factor / 1.5)
+
+    def snapshot(self):
+        return {
+            "captures": self.captures.count,
+            "captures_throttled": self.captures.throttled,
+            "matches": self.matches.count,
+            "matches_throttled": self.matches.throttled,
+            "poll_factor": round(self.poll_factor, 2),
+        }
@@ -1,6 +1,4 @@
 from .workflow import Workflow
-import pyautogui
-import pywinctl as pwc
 
 
 class CheckIfOnline(Workflow):
@@ -10,9 +8,9 @@ class CheckIfOnline(Workflow):
     def run(self, tab_index=0):
         super().run()
 
-        self.click_canvas_index(index=tab_index)
+        self.click_canvas_index(index=tab_index, target="online.png")
 
-        online = pyautogui.locateOnScreen(self.get_image_path("online.png"), confidence=0.9)
+        online = self.locate("online.png")
         if not online:
             return False
 
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+# capture: screenshot pixels per click coordinate (2 on a macOS retina display,
+#          1 on Windows where pyautogui runs DPI aware)
+# ui:      screenshot pixels per app design pixel (2 on retina, 1.25/1.5 for
+#          125%/150% Windows scaling)
+DisplayScale = namedtuple("DisplayScale", ["capture", "ui"])
+
+SCALE_FILE = "display_scale.json"
+
+
+def detect_display_scale(window=None):
+    """Detect the capture and UI scale of the display the window is on"""
+    import pyautogui
+    import pyscreeze
+
+    screen_width, _ = pyautogui.size()
+    capture = round(pyscreeze.screenshot().width / screen_width, 3)
+
+    ui = _window_dpi_scale(window)
+    if ui is None:
+        # Without a per-window DPI the UI scale follows the capture scale
+        ui = capture
+
+    return DisplayScale(capture=capture, ui=ui)
+
+
+def _window_dpi_scale(window):
+    """Windows only: the window's DPI relative to the 96 DPI baseline"""
+    if sys.platform != "win32" or window is None:
+        return None
+    try:
+        import ctypes
+
+        dpi = ctypes.windll.user32.GetDpiForWindow(window.getHandle())
+    except Exception:
+        return None
+    if not dpi:
+        return None
+    return round(dpi / 96, 3)
+
+
+def load_display_scale(data_dir, window_key):
+    """Return the persisted scale for a window, or None"""
+    path = os.path.join(data_dir, SCALE_FILE)
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(window_key)
+    except (OSError, ValueError):
+        return None
+    if not entry:
+        return None
+    return DisplayScale(capture=entry["capture"], ui=entry["ui"])
+
+
+def save_display_scale(data_dir, window_key, scale):
+    """Persist the detected scale for a window"""
+    path = os.path.join(data_dir, SCALE_FILE)
+    try:
+        with open(path) as f:
+            scales = json.load(f)
+    except (OSError, ValueError):
+        scales = {}
+
+    scales[window_key] = {
+        "capture": scale.capture,
+        "ui": scale.ui,
+        "detected_at": time.time(),
+    }
+    os.makedirs(data_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(scales, f, indent=2)
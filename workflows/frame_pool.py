@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_BUFFERS = 12  # e.g. full screen and window region, per view
+
+
+class FramePool:
+    """Preallocated image buffers reused from one capture to the next.
+
+    Captures are converted and preprocessed into these buffers with
+    OpenCV's dst arguments instead of into fresh arrays, so a long wait
+    polling every second does not allocate full-screen images each time.
+    Buffers are keyed by purpose and shape, so alternating between the full
+    screen and a window region does not reallocate either. The least
+    recently used buffer is dropped beyond MAX_BUFFERS.
+
+    A buffer is overwritten by the next capture of the same shape, so a
+    Frame must not be used after the next grab().
+    """
+
+    def __init__(self, max_buffers=MAX_BUFFERS):
+        self.max_buffers = max_buffers
+        self._buffers = OrderedDict()
+        # Kept as a running total so the metrics loop can read it from its thread
+        self.nbytes = 0
+
+    def get(self, purpose, shape, dtype=np.uint8):
+        """The buffer for a purpose and shape, allocated on first use"""
+        key = (purpose, tuple(shape), np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = np.empty(shape, dtype)
+            self.nbytes += buffer.nbytes
+            while len(self._buffers) > self.max_buffers:
+                self.nbytes -= self._buffers.popitem(last=False)[1].nbytes
+        else:
+            self._buffers.move_to_end(key)
+        return buffer
+
+    def clear(self):
+        self._buffers.clear()
+        self.nbytes = 0
@@ -0,0 +1,155 @@
+import collections
+import json
+import os
+import threading
+import time
+import zipfile
+
+import cv2
+
+DEFAULT_CAPACITY = 60  # captures kept
+DEFAULT_MAX_BYTES = 24 * 1024 * 1024  # hard cap on the encoded captures
+DEFAULT_DOWNSCALE = 0.5
+JPEG_QUALITY = 70
+MANIFEST = "manifest.json"
+
+
+class FrameRing:
+    """Bounded in-memory history of recent captures and match results.
+
+    Captures are downscaled and JPEG-encoded as they are recorded, and the
+    oldest ones are evicted once either the entry count or the byte budget
+    is exceeded, so memory stays flat through a 15 minute print wait.
+    Nothing touches the disk until dump() is called for a failed job.
+    """
+
+    def __init__(
+        self,
+        capacity=DEFAULT_CAPACITY,
+        max_bytes=DEFAULT_MAX_BYTES,
+        downscale=DEFAULT_DOWNSCALE,
+    ):
+        self.max_bytes = max_bytes
+        self.downscale = downscale
+        self._entries = collections.deque(maxlen=capacity)
+        self._bytes = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def record_frame(self, frame, scale):
+        """Keep a compressed copy of a capture; returns its id"""
+        image = cv2.resize(
+            frame.image,
+            None,
+            fx=self.downscale,
+            fy=self.downscale,
+            interpolation=cv2.INTER_AREA,
+        )
+        ok, encoded = cv2.imencode(
+            ".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+        )
+        if not ok:
+            return None
+        data = encoded.tobytes()
+
+        with self._lock:
+            frame_id = self._next_id
+            self._next_id += 1
+            if len(self._entries) == self._entries.maxlen:
+                self._evict()
+            self._entries.append(
+                {
+                    "id": frame_id,
+                    "time": time.time(),
+                    "left": frame.left,
+                    "top": frame.top,
+                    "capture_scale": scale.capture,
+                    "ui_scale": scale.ui,
+                    "matches": [],
+                    "events": [],
+                    "jpeg": data,
+                }
+            )
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._evict()
+        return frame_id
+
+    def record_match(self, frame_id, image_name, mode, score, confidence):
+        """Attach a match result to the capture it was scored against"""
+        with self._lock:
+            entry = self._find(frame_id)
+            if entry is not None:
+                entry["matches"].append(
+                    {
+                        "template": image_name,
+                        "mode": mode,
+                        "score": round(float(score), 4),
+                        "confidence": confidence,
+                    }
+                )
+
+    def record_event(self, text):
+        """Attach a note (e.g. the workflow that started) to the latest capture"""
+        with self._lock:
+            if self._entries:
+                self._entries[-1]["events"].append(text)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def dump(self, directory, reason, context=None):
+        """Write the buffered captures to a zip for replay_failure.py; returns its path"""
+        with self._lock:
+            entries = list(self._entries)
+
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("failure-%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"{name}.zip")
+
+        manifest = {
+            "reason": reason,
+            "context": context or {},
+            "dumped_at": time.time(),
+            "downscale": self.downscale,
+            "frames": [],
+        }
+        with zipfile.ZipFile(path, "w") as archive:
+            for entry in entries:
+                filename = f"frame_{entry['id']:06d}.jpg"
+                # JPEG is already compressed; store it as is
+                archive.writestr(filename, entry["jpeg"], zipfile.ZIP_STORED)
+                meta = {key: value for key, value in entry.items() if key != "jpeg"}
+                meta["file"] = filename
+                manifest["frames"].append(meta)
+            archive.writestr(MANIFEST, json.dumps(manifest, indent=2))
+        return path
+
+    def _find(self, frame_id):
+        for entry in reversed(self._entries):
+            if entry["id"] == frame_id:
+                return entry
+        return None
+
+    def _evict(self):
+        entry = self._entries.popleft()
+        self._bytes -= len(entry["jpeg"])
+
+
+def load_dump(path):
+    """Read a failure dump; returns (manifest, [(frame_meta, BGR image), ...])"""
+    import numpy as np
+
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read(MANIFEST))
+        frames = []
+        for meta in manifest["frames"]:
+            data = np.frombuffer(archive.read(meta["file"]), np.uint8)
+            frames.append((meta, cv2.imdecode(data, cv2.IMREAD_COLOR)))
+    return manifest, frames
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_FILE = "layout.json"
+
+# Click targets in app design pixels (100% scaling), measured from the left or
+# right window edge and the top edge.
+CANVAS_TAB_OFFSET = 168  # from the left edge of the window to the first canvas tab
+CANVAS_TAB_WIDTH = 128
+CANVAS_TAB_COUNT = 2
+DEFAULT_ANCHORS = {
+    "home": (45, 45, "left"),
+    "machine": (130, 45, "left"),
+    "scan_tray": (36, 360, "right"),
+    "zero_point": (36, 413, "right"),
+    # Where the zero point option moves when a snapshot option is listed above it
+    "zero_point_snapshot": (36, 458, "right"),
+}
+for _index in range(CANVAS_TAB_COUNT):
+    DEFAULT_ANCHORS[f"canvas_{_index}"] = (
+        CANVAS_TAB_OFFSET + _index * CANVAS_TAB_WIDTH + CANVAS_TAB_WIDTH / 2,
+        45,
+        "left",
+    )
+
+# Optional templates in the image directory that pin an anchor exactly; without
+# one the anchor is the default position scaled to the display
+ANCHOR_TEMPLATE = "anchor-{name}.png"
+
+
+class LayoutMap:
+    """Click targets for the current display scale, calibrated once and persisted.
+
+    Anchors are measured from a window edge, so they only depend on the
+    scale: entries are keyed by click coordinates per design pixel. Without
+    anchor templates calibrating is just scaling the defaults, so nothing
+    is captured. Workflows click from the map without searching the screen;
+    when a verification match after a click fails they call recalibrate()
+    and, if it can measure anything, try again.
+    """
+
+    def __init__(self, data_dir, matcher):
+        self.path = os.path.join(data_dir, LAYOUT_FILE)
+        self.matcher = matcher
+        self._lock = threading.Lock()
+        self._layouts = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                layouts = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Layouts keyed by window size, or that folded the snapshot shift into
+        # zero_point, are recalibrated
+        return {
+            key: layout
+            for key, layout in layouts.items()
+            if "x" not in key and "snapshot_visible" not in layout
+        }
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self._layouts, f, indent=2)
+
+    @property
+    def factor(self):
+        """Click coordinates per design pixel"""
+        return self.matcher.scale.ui / self.matcher.scale.capture
+
+    def key(self):
+        return f"{self.factor:g}"
+
+    @property
+    def anchor_templates(self):
+        """Names of the anchors with an anchor template to locate them by"""
+        return [
+            name
+            for name in DEFAULT_ANCHORS
+            if os.path.exists(
+                os.path.join(self.matcher.image_path, ANCHOR_TEMPLATE.format(name=name))
+            )
+        ]
+
+    def anchor(self, name, rect):
+        """Window-relative (x, y, side) of an anchor in click coordinates"""
+        with self._lock:
+            layout = self._layouts.get(self.key())
+            if layout is None or name not in layout["anchors"]:
+                layout = self._calibrate(rect)
+            return tuple(layout["anchors"][name])
+
+    def point(self, name, rect):
+        """Absolute click point of an anchor"""
+        x, y, side = self.anchor(name, rect)
+        if side == "right":
+            return rect.right - x, rect.top + y
+        return rect.left + x, rect.top + y
+
+    def recalibrate(self, rect):
+        """Locate the anchors again, e.g. after a failed verification.
+
+        Returns False if there are no anchor templates, as calibrating
+        again would only give the same scaled defaults.
+        """
+        with self._lock:
+            if not self.anchor_templates:
+                return False
+            logger.info(f"Recalibrating layout for {self.key()}")
+            self._calibrate(rect)
+            return True
+
+    def _calibrate(self, rect):
+        factor = self.factor
+        located = self.anchor_templates
+        frame = self.matcher.grab() if located else None
+        anchors = {}
+        for name, (x, y, side) in DEFAULT_ANCHORS.items():
+            position = None
+            if name in located:
+                position = self._locate_anchor(name, rect, frame, side)
+            anchors[name] = position or (x * factor, y * factor, side)
+
+        layout = {"anchors": anchors, "calibrated_at": time.time()}
+        self._layouts[self.key()] = layout
+        self._save()
+        logger.info(f"Calibrated layout for {self.key()}: {anchors}")
+        return layout
+
+    def _locate_anchor(self, name, rect, frame, side):
+        template = ANCHOR_TEMPLATE.format(name=name)
+        match = self.matcher.locate(template, frame=frame)
+        if match is None:
+            return None
+        x, y = match.center
+        if side == "right":
+            return (rect.right - x, y - rect.top, side)
+        return (x - rect.left, y - rect.top, side)
@@ -0,0 +1,83 @@
+import time
+from dataclasses import dataclass
+
+from .settle import SettleDetector
+from .workflow import Workflow
+
+# The machine tab has started rendering once one of these is visible
+SETTLE_TEMPLATES = ("idle.png", "inject-ink.png")
+SETTLE_TIMEOUT = 3.0
+SETTLE_POLL_INTERVAL = 0.25
+# ...and has finished once it has not changed for this long
+SETTLE_STABLE_TIME = 0.5
+
+
+@dataclass(frozen=True)
+class PreflightReport:
+    """Printer status read from the machine tab"""
+
+    idle: bool
+    low_ink: bool
+    inject_ink: object  # Match of the inject ink button if moisturizing is due
+    settle_time: float  # seconds from the click until the tab had rendered
+
+    @property
+    def needs_moisturize(self):
+        return self.inject_ink is not None
+
+
+class MachinePreflight(Workflow):
+    """Reads idle, low-ink and inject-ink status with a single machine tab click.
+
+    Replaces clicking the tab once per check, each with a fixed 2 second
+    sleep: the tab is clicked once and polled until it has rendered, and
+    all three templates are matched against the same capture. The idle
+    status can show before the inject ink button, so a visible template
+    only ends the polling once the tab has stopped changing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, name="Machine preflight", **kwargs)
+
+    def run(self):
+        super().run()
+
+        # click the printers tab
+        self.click_machine(sleep=False)
+        clicked = time.monotonic()
+
+        names = ["idle.png", "low-ink.png", "inject-ink.png"]
+        previous = changed_at = rendered_at = None
+        while True:
+            frame = self.matcher.grab(self.window_region())
+            matches = self.matcher.locate_all(names, frame=frame)
+            now = time.monotonic()
+            settle_time = now - clicked
+            if all(matches[name] for name in SETTLE_TEMPLATES):
+                # Nothing left to appear
+                break
+
+            current = SettleDetector.reduce(frame.image)
+            if previous is None or SettleDetector.differs(previous, current):
+                changed_at = now
+            previous = current
+            if rendered_at is None and any(matches[n] for n in SETTLE_TEMPLATES):
+                rendered_at = now
+            # Stable since the last change, counting from the first capture
+            # that showed the tab
+            if rendered_at is not None:
+                if now - max(changed_at, rendered_at) >= SETTLE_STABLE_TIME:
+                    break
+            if settle_time >= SETTLE_TIMEOUT:
+                # Not idle and nothing to do (e.g. busy printing); report as is
+                break
+            self.sleep(SETTLE_POLL_INTERVAL)
+
+        report = PreflightReport(
+            idle=matches["idle.png"] is not None,
+            low_ink=matches["low-ink.png"] is not None,
+            inject_ink=matches["inject-ink.png"],
+            settle_time=settle_time,
+        )
+        self.logger.info(f"Preflight: {report}")
+        return report
@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+
+SCORES_FILE = "match_scores.json"
+THRESHOLDS_FILE = "thresholds.json"
+BINS = 100  # score histogram resolution: 0.01
+
+
+def score_bin(score):
+    """Histogram bin of a match score; negative correlations land in bin 0"""
+    return min(BINS - 1, max(0, int(score * BINS)))
+
+
+class MatchStats:
+    """Histogram of the best score of every template lookup, hit or miss.
+
+    Per template and matching mode there are two fixed-size count arrays
+    (hits and misses), so the store stays a few KB no matter how long the
+    service runs. Scores from different modes are not comparable, hence
+    the split by mode. Counts are merged into the file on disk when saved.
+    """
+
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, SCORES_FILE)
+        self._lock = threading.Lock()
+        self._pending = {}  # counts recorded since the last save
+
+    def record(self, image_name, mode, score, hit):
+        with self._lock:
+            modes = self._pending.setdefault(image_name, {})
+            counts = modes.get(mode)
+            if counts is None:
+                counts = modes[mode] = {"hit": [0] * BINS, "miss": [0] * BINS}
+            counts["hit" if hit else "miss"][score_bin(score)] += 1
+
+    def save(self):
+        """Merge the counts recorded since the last save into the file"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        histograms = load_histograms(self.path)
+        for image_name, modes in pending.items():
+            for mode, counts in modes.items():
+                merge_counts(histograms, image_name, mode, counts)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(histograms, f)
+
+
+def merge_counts(histograms, image_name, mode, counts):
+    """Add one template's hit/miss counts in one mode into a histogram dict"""
+    target = histograms.setdefault(image_name, {}).setdefault(
+        mode, {"hit": [0] * BINS, "miss": [0] * BINS}
+    )
+    for kind in ("hit", "miss"):
+        target[kind] = [a + b for a, b in zip(target[kind], counts[kind])]
+
+
+def load_histograms(path):
+    """{template: {mode: {"hit": counts, "miss": counts}}} from a histogram file"""
+    try:
+        with open(path) as f:
+            histograms = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Files from before the split by mode do not say which mode a score is
+    # from, so their counts are dropped
+    return {
+        image_name: modes
+        for image_name, modes in histograms.items()
+        if "hit" not in modes
+    }
+
+
+def load_thresholds(data_dir):
+    """Per-template matching config written by tune_thresholds.py"""
+    try:
+        with open(os.path.join(data_dir, THRESHOLDS_FILE)) as f:
+            return json.load(f).get("templates", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_thresholds(data_dir, templates):
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, THRESHOLDS_FILE), "w") as f:
+        json.dump({"templates": templates}, f, indent=2)
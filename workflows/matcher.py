@@ -0,0 +1,413 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pyscreeze
+
+from .display_scale import DisplayScale
+from .frame_pool import FramePool
+from .template_bundle import (
+    PYRAMID_LEVELS,
+    TemplateBundle,
+    load_manifest,
+    master_sets,
+    template_names,
+)
+
+DEFAULT_CONFIDENCE = 0.9
+DEFAULT_MODE = "color"
+# matchTemplate releases the GIL, so templates can be scored on several cores
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+MODES = ("color", "grayscale", "binary", "edges")
+
+# Preprocessing parameters; templates and frames always go through the same
+# pipeline, so the exact values matter less than applying them consistently
+BINARY_BLOCK_SIZE = 15  # neighbourhood for the local (adaptive) threshold
+BINARY_OFFSET = 5
+CANNY_LOW, CANNY_HIGH = 50, 150
+DILATE_KERNEL = np.ones((3, 3), np.uint8)
+BAND_ROWS = 64  # screenshot rows copied out of Pillow at a time
+
+
+def _buffer(pool, purpose, shape):
+    """A reusable buffer from the pool, or None to let OpenCV allocate"""
+    return None if pool is None else pool.get(purpose, shape)
+
+
+def _to_bgr(image, dst=None):
+    """Convert an RGB or RGBA screenshot array to BGR"""
+    code = cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_RGB2BGR
+    return cv2.cvtColor(image, code, dst=dst)
+
+
+def preprocess(image, mode, pool=None):
+    """Convert a BGR image into the representation used by a matching mode.
+
+    grayscale drops colour (a third of the data to match). binary applies a
+    local threshold, which ignores theme brightness and anti-aliasing
+    shades. edges keeps only outlines, thickened by a pixel so that small
+    resampling offsets still overlap.
+
+    With a FramePool the results are written into its buffers instead of
+    newly allocated arrays.
+    """
+    if mode == "color":
+        return image
+    if mode not in MODES:
+        raise ValueError(f"Unknown matching mode: {mode}")
+    shape = image.shape[:2]
+    if not image.size:
+        return np.zeros(shape, np.uint8)  # OpenCV rejects empty images
+    gray = cv2.cvtColor(
+        image, cv2.COLOR_BGR2GRAY, dst=_buffer(pool, "grayscale", shape)
+    )
+    if mode == "grayscale":
+        return gray
+    if mode == "binary":
+        return cv2.adaptiveThreshold(
+            gray,
+            255,
+            cv2.ADAPTIVE_THRESH_MEAN_C,
+            cv2.THRESH_BINARY,
+            BINARY_BLOCK_SIZE,
+            BINARY_OFFSET,
+            dst=_buffer(pool, "binary", shape),
+        )
+    edges = cv2.Canny(gray, CANNY_LOW, CANNY_HIGH, edges=_buffer(pool, "canny", shape))
+    return cv2.dilate(edges, DILATE_KERNEL, dst=_buffer(pool, "edges", shape))
+
+
+class Frame:
+    """A captured screen (or part of it) in BGR; left/top are in capture pixels.
+
+    Preprocessed views for the other matching modes are computed at most once
+    per capture and shared by every template matched against it. With a
+    FramePool they are written into its reusable buffers.
+    """
+
+    __slots__ = ("image", "left", "top", "frame_id", "pool", "_views")
+
+    def __init__(self, image, left=0, top=0, frame_id=None, pool=None):
+        self.image = image
+        self.left = left
+        self.top = top
+        self.frame_id = frame_id  # id in the FrameRing, if the capture was recorded
+        self.pool = pool
+        self._views = {"color": image}
+
+    def view(self, mode):
+        view = self._views.get(mode)
+        if view is None:
+            view = self._views[mode] = preprocess(self.image, mode, self.pool)
+        return view
+
+
+class Match(namedtuple("Match", ["left", "top", "width", "height", "score"])):
+    """A template match in click coordinates"""
+
+    __slots__ = ()
+
+    @property
+    def center(self):
+        return (self.left + self.width / 2, self.top + self.height / 2)
+
+
+class Matcher:
+    """Locates templates on screen at the detected display scale.
+
+    Templates come from the main master set, or from an extra master set
+    (e.g. retina crops) captured closer to the display's UI scale. The
+    chosen master is resized once to the UI scale and cached, and match
+    positions are mapped back to click coordinates with the display's
+    capture scale.
+    """
+
+    def __init__(
+        self,
+        image_path="images",
+        scale=None,
+        stats=None,
+        thresholds=None,
+        ring=None,
+        budget=None,
+        reuse_buffers=True,
+    ):
+        self.image_path = image_path
+        self.scale = scale or DisplayScale(capture=1.0, ui=1.0)
+        self.stats = stats  # optional MatchStats recording every lookup's score
+        self.ring = ring  # optional FrameRing keeping recent captures for failures
+        self.budget = budget  # optional DetectionBudget rate limiting captures/matches
+        self.thresholds = thresholds or {}  # per-template confidence and mode
+        self._templates = {}
+        self._masters = {}
+        # Precompiled arrays from build_templates.py; None falls back to the PNGs
+        self.bundle = TemplateBundle.load(image_path)
+        if self.bundle is not None:
+            self._manifest = self.bundle.manifest
+        else:
+            self._manifest = load_manifest(image_path)
+        self._pool = None
+        # Capture buffers reused by every grab; a Frame is only valid until the
+        # next grab of the same size
+        self.buffers = FramePool() if reuse_buffers else None
+
+    def template_info(self, image_name):
+        """Manifest metadata for a template"""
+        return self._manifest.get("templates", {}).get(image_name, {})
+
+    def template_scale(self, image_name):
+        """UI scale the master template was captured at"""
+        return self.template_info(image_name).get(
+            "scale", self._manifest.get("default_scale", 1.0)
+        )
+
+    def master(self, image_name):
+        """(source, scale) of the master template used at the current UI scale.
+
+        The smallest master captured at or above the UI scale, since shrinking
+        keeps more detail than enlarging; the largest one below it otherwise.
+        """
+        if image_name in self._masters:
+            return self._masters[image_name]
+        masters = [(image_name, self.template_scale(image_name))]
+        for subdir, scale in master_sets(self._manifest).items():
+            source = f"{subdir}/{image_name}"
+            if self.bundle is not None:
+                found = self.bundle.array(source) is not None
+            else:
+                found = os.path.exists(os.path.join(self.image_path, source))
+            if found:
+                masters.append((source, scale))
+        larger = [m for m in masters if m[1] >= self.scale.ui - 0.01]
+        if larger:
+            master = min(larger, key=lambda m: m[1])
+        else:
+            master = max(masters, key=lambda m: m[1])
+        self._masters[image_name] = master
+        return master
+
+    def confidence(self, image_name):
+        """Tuned confidence threshold for a template"""
+        return self.thresholds.get(image_name, {}).get("confidence", DEFAULT_CONFIDENCE)
+
+    def mode(self, image_name):
+        """Matching mode for a template: tuned, else from the manifest"""
+        mode = self.thresholds.get(image_name, {}).get("mode") or self.template_info(
+            image_name
+        ).get("mode", DEFAULT_MODE)
+        return mode if mode in MODES else DEFAULT_MODE
+
+    def _factor(self, image_name):
+        """Resize factor from the master template to the current UI scale"""
+        factor = self.scale.ui / self.master(image_name)[1]
+        return 1.0 if abs(factor - 1) <= 0.01 else factor
+
+    def _bundled(self, image_name, mode):
+        """A precompiled template array usable as-is at the current scale, or None"""
+        if self.bundle is None or mode not in ("color", "grayscale"):
+            return None
+        source = self.master(image_name)[0]
+        factor = self._factor(image_name)
+        if factor == 1.0:
+            return self.bundle.array(source, mode)
+        if mode == "grayscale":
+            # Pyramid levels stand in for half and quarter scale grayscale
+            for level in range(1, PYRAMID_LEVELS + 1):
+                if abs(factor * 2**level - 1) <= 0.01:
+                    return self.bundle.array(source, f"pyramid_{level}")
+        return None
+
+    def _resize(self, image, image_name, interpolation=None):
+        factor = self._factor(image_name)
+        if factor == 1.0:
+            return image
+        if interpolation is None:
+            interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_CUBIC
+        return cv2.resize(
+            image, None, fx=factor, fy=factor, interpolation=interpolation
+        )
+
+    def template(self, image_name, mode=DEFAULT_MODE):
+        """The template resized to the current UI scale (cached)"""
+        key = image_name if mode == DEFAULT_MODE else (image_name, mode)
+        template = self._templates.get(key)
+        if template is not None:
+            return template
+
+        template = self._bundled(image_name, mode)
+        if template is None and mode != DEFAULT_MODE:
+            template = preprocess(self.template(image_name), mode)
+        elif template is None:
+            source = self.master(image_name)[0]
+            if self.bundle is not None:
+                template = self.bundle.array(source)
+            else:
+                path = os.path.join(self.image_path, source)
+                template = cv2.imread(path, cv2.IMREAD_COLOR)
+                if template is None:
+                    raise FileNotFoundError(f"Template not found: {path}")
+            template = self._resize(template, image_name)
+        self._templates[key] = template
+        return template
+
+    def mask(self, image_name):
+        """Mask of a template's opaque pixels at the current UI scale, or None.
+
+        Only bundled templates with transparent pixels have one.
+        """
+        key = (image_name, "mask")
+        if key not in self._templates:
+            mask = None
+            if self.bundle is not None:
+                mask = self.bundle.array(self.master(image_name)[0], "mask")
+            if mask is not None:
+                # Nearest neighbour keeps the mask binary
+                mask = self._resize(mask, image_name, cv2.INTER_NEAREST)
+            self._templates[key] = mask
+        return self._templates[key]
+
+    def warm_up(self):
+        """Decode and scale every template up front; returns the template count"""
+        names = template_names(self.image_path)
+        for name in names:
+            self.template(name)
+        return len(names)
+
+    def set_scale(self, scale):
+        """Switch to a new display scale, dropping the resized templates"""
+        if scale != self.scale:
+            self.scale = scale
+            self._templates.clear()
+            self._masters.clear()
+
+    def grab(self, region=None, record=True):
+        """Capture the screen; region is (left, top, width, height) in click coordinates.
+
+        record=False keeps the capture out of the FrameRing, for frequent
+        captures that only matter for a moment.
+        """
+        if self.budget is not None:
+            self.budget.acquire_capture()
+        screenshot = pyscreeze.screenshot()
+
+        width, height = screenshot.size
+        left, top, right, bottom = 0, 0, width, height
+        if region is not None:
+            # Only the region is copied out of the screenshot and converted
+            capture = self.scale.capture
+            left = min(width, max(0, int(region[0] * capture)))
+            top = min(height, max(0, int(region[1] * capture)))
+            right = max(left, min(width, int((region[0] + region[2]) * capture)))
+            bottom = max(top, min(height, int((region[1] + region[3]) * capture)))
+
+        box = (left, top, right, bottom)
+        if right == left or bottom == top:
+            # Region entirely off screen; nothing matches an empty frame
+            image = np.zeros((bottom - top, right - left, 3), np.uint8)
+        elif self.buffers is None:
+            image = _to_bgr(np.asarray(screenshot.crop(box)))
+        else:
+            image = self.buffers.get("bgr", (bottom - top, right - left, 3))
+            # np.asarray goes through Image.tobytes, which briefly holds two
+            # copies of the image, so convert a band of rows at a time
+            for y in range(top, bottom, BAND_ROWS):
+                band = screenshot.crop((left, y, right, min(y + BAND_ROWS, bottom)))
+                rows = np.asarray(band)
+                _to_bgr(rows, image[y - top : y - top + len(rows)])
+        frame = Frame(image, left, top, pool=self.buffers)
+
+        if self.ring is not None and record:
+            frame.frame_id = self.ring.record_frame(frame, self.scale)
+        return frame
+
+    def score(self, image_name, frame, mode=None):
+        """Best match score and its top-left position within the frame.
+
+        mode overrides the template's matching mode.
+        """
+        mode = mode or self.mode(image_name)
+        template = self.template(image_name, mode)
+        height, width = template.shape[:2]
+        if frame.image.shape[0] < height or frame.image.shape[1] < width:
+            return 0.0, (0, 0)
+
+        if self.budget is not None:
+            self.budget.acquire_match()
+        mask = self.mask(image_name)
+        result = cv2.matchTemplate(
+            frame.view(mode), template, cv2.TM_CCOEFF_NORMED, mask=mask
+        )
+        if mask is not None:
+            # Masked scores are undefined where the masked region is flat
+            result[~np.isfinite(result)] = 0
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if not np.isfinite(max_val):
+            # A flat (zero variance) template or region has no defined score
+            return 0.0, max_loc
+        return max_val, max_loc
+
+    def locate(self, image_name, confidence=None, frame=None, record=True):
+        """Find a template on screen; returns a Match in click coordinates or None.
+
+        record=False keeps the score out of the MatchStats histograms, for
+        probes of frames that may be half rendered.
+        """
+        if frame is None:
+            frame = self.grab(record=record)
+        if confidence is None:
+            confidence = self.confidence(image_name)
+
+        score, (x, y) = self.score(image_name, frame)
+        if self.stats is not None and record:
+            self.stats.record(
+                image_name, self.mode(image_name), score, score >= confidence
+            )
+        if self.ring is not None and frame.frame_id is not None:
+            self.ring.record_match(
+                frame.frame_id, image_name, self.mode(image_name), score, confidence
+            )
+        if score < confidence:
+            return None
+
+        height, width = self.template(image_name).shape[:2]
+        capture = self.scale.capture
+        return Match(
+            left=(frame.left + x) / capture,
+            top=(frame.top + y) / capture,
+            width=width / capture,
+            height=height / capture,
+            score=score,
+        )
+
+    def locate_all(self, image_names, confidence=None, frame=None):
+        """Find several templates in one frame concurrently.
+
+        Returns {image_name: Match or None} for every requested template.
+        """
+        if frame is None:
+            frame = self.grab()
+
+        # Decode templates and preprocess the frame once up front, so the
+        # workers only run matchTemplate
+        for image_name in image_names:
+            mode = self.mode(image_name)
+            self.template(image_name, mode)
+            frame.view(mode)
+
+        if len(image_names) < 2 or MAX_WORKERS < 2:
+            return {
+                name: self.locate(name, confidence=confidence, frame=frame)
+                for name in image_names
+            }
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="matcher"
+            )
+        futures = {
+            name: self._pool.submit(self.locate, name, confidence, frame)
+            for name in image_names
+        }
+        return {name: future.result() for name, future in futures.items()}
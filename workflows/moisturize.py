@@ -0,0 +1,27 @@
+from .workflow import Workflow
+
+
+class Moisturize(Workflow):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, name="Moisturize", **kwargs)
+
+    def run(self, inject_ink):
+        """Inject ink via the given button match and wait for it to complete"""
+        super().run()
+
+        self.click(inject_ink.center, "inject_ink")
+
+        # Moisturizing
+        # Wait until the ink injection has completed
+        complete = self.wait_for("inject-ink-complete.png", timeout=300)
+        if not complete:
+            return False
+
+        # Confirm the completion dialog
+        confirm = self.locate("okay.png")
+        if confirm:
+            self.click(confirm.center, "okay")
+        else:
+            return False
+
+        return True
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+
+PHASES_FILE = "phase_durations.json"
+MAX_SAMPLES = 50  # most recent durations kept per phase
+MIN_SAMPLES = 3  # durations needed before polling adapts
+EARLY_QUANTILE = 0.05
+EARLY_MARGIN = 0.9  # start dense polling a bit before the earliest expected end
+DENSE_INTERVAL = 1.0  # seconds between polls near the expected end
+DEFAULT_MAX_LATENCY = 10.0  # upper bound on any poll interval
+
+
+class PhaseStats:
+    """Learned durations of the long waits in a job, used to space out polls.
+
+    Durations are kept per phase key (canvas, job profile and phase, e.g.
+    "canvas_1/zero_point/print_complete"). Until a phase has a few samples it
+    is polled every DENSE_INTERVAL like before. After that it is polled
+    sparsely until shortly before the earliest expected completion and
+    densely from then on. No interval ever exceeds max_latency, which bounds
+    the completion detection latency even for an unusually short phase.
+    """
+
+    def __init__(self, data_dir, max_latency=DEFAULT_MAX_LATENCY):
+        self.path = os.path.join(data_dir, PHASES_FILE)
+        self.max_latency = max(DENSE_INTERVAL, max_latency)
+        self._lock = threading.Lock()
+        self._durations = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self._durations, f, indent=2)
+
+    def record(self, key, duration):
+        """Add the duration of a completed phase and persist it"""
+        with self._lock:
+            samples = self._durations.setdefault(key, [])
+            samples.append(round(duration, 1))
+            del samples[:-MAX_SAMPLES]
+            self._save()
+
+    def earliest(self, key):
+        """Early-quantile duration of a phase, or None without enough samples"""
+        samples = sorted(self._durations.get(key, []))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[int(EARLY_QUANTILE * (len(samples) - 1))]
+
+    def next_interval(self, key, elapsed):
+        """Seconds to wait before the next poll, elapsed seconds into a phase"""
+        earliest = self.earliest(key)
+        if earliest is None:
+            return DENSE_INTERVAL
+        remaining = earliest * EARLY_MARGIN - elapsed
+        return min(self.max_latency, max(DENSE_INTERVAL, remaining))
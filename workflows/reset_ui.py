@@ -1,6 +1,4 @@
 from .workflow import Workflow
-import pyautogui
-import pywinctl as pwc
 
 
 class ResetUIWorkflow(Workflow):
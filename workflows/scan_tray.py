@@ -1,6 +1,4 @@
 from .workflow import Workflow
-import pyautogui
-import pywinctl as pwc
 
 
 class ScanTray(Workflow):
@@ -13,29 +11,23 @@ class ScanTray(Workflow):
         self.click_canvas_index(index=canvas_index)
 
         # select the scan tray option
-        self.click_at(36, 360, relative_to_right_window_side=True)
+        self.click_anchor("scan_tray", target="snapshot.png")
 
-        center = pyautogui.locateCenterOnScreen(self.get_image_path("snapshot.png"), confidence=0.9)
-        if not center:
+        match = self.locate("snapshot.png")
+        if not match:
             return False
 
-        pyautogui.click(self.transform_point_to_non_retina(center))
-
         # Give it a little while to start
-        pyautogui.sleep(2)
+        self.click(match.center, "snapshot")
 
         # Open the machine tab
         self.click_machine()
 
         # Loop until the machine is idle again and therefore finished with scanning
-        checks = 0
-        while True:
-            pyautogui.sleep(1)
-            online = pyautogui.locateOnScreen(self.get_image_path("idle.png"), confidence=0.9)
-            if online:
-                break
-            checks += 1
-            if checks > 300:
-                return False
+        idle = self.wait_for(
+            "idle.png", timeout=300, phase=f"canvas_{canvas_index}/scan/scan_tray"
+        )
+        if not idle:
+            return False
 
         return True
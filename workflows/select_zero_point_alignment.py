@@ -1,39 +1,47 @@
 from .workflow import Workflow
-import pyautogui
-import pywinctl as pwc
 
 
 class SelectZeroPointAlignment(Workflow):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, name="Select Zero Point Alignment", **kwargs)
 
-    def run(self, canvas_index=0):
+    def run(self, canvas_index=0, reuse=False):
+        """Select the zero point alignment on a canvas.
+
+        With reuse, the previous job on this canvas has already selected it;
+        the option is only clicked again if it is no longer selected.
+        """
         super().run()
 
         self.click_canvas_index(index=canvas_index)
 
-        y_offset = 413
+        if reuse and self.locate("recalibrate-zero-point.png"):
+            self.logger.info("Zero point alignment still selected")
+            return True
 
-        # If snapshot is selected the offset is larger
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("snapshot.png"), confidence=0.9
-        )
-        if center:
-            print("Snapshot detected, adjusting offset")
-            y_offset = 458
-        else:
-            print("No snapshot detected, using default offset")
+        # A snapshot option listed above the zero point option shifts it
+        # down; only the canvas tab shows whether there is one
+        anchor = "zero_point"
+        if self.locate("snapshot.png"):
+            self.logger.info("Snapshot detected, using the lower zero point option")
+            anchor = "zero_point_snapshot"
 
-        # select the zero point alignment option
-        self.click_at(36, y_offset, relative_to_right_window_side=True)
+        if self.select_zero_point(anchor):
+            return True
 
-        pyautogui.sleep(2)
+        # The stored position may be stale, so locate the anchors again and
+        # retry once; without anchor templates it would be the same point
+        if not self.recalibrate_layout():
+            return False
+        return self.select_zero_point(anchor)
+
+    def select_zero_point(self, anchor="zero_point"):
+        # select the zero point alignment option
+        self.click_anchor(anchor, target="recalibrate-zero-point.png")
 
         # Quick check if the selection was successful
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("recalibrate-zero-point.png"), confidence=0.9
-        )
-        if not center:
+        match = self.locate("recalibrate-zero-point.png")
+        if not match:
             return False
 
         return True
@@ -0,0 +1,92 @@
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+STABLE_TIME = 0.3  # the UI has settled once unchanged for this long
+POLL_INTERVAL = 0.1
+DIFF_SCALE = 0.25  # captures are compared at quarter size
+PIXEL_THRESHOLD = 24  # grey levels a pixel must change by to count as changed
+CHANGED_FRACTION = 0.001  # share of changed pixels that makes two captures differ
+
+# The reduced pre-click capture, and whether the click's target was already visible
+Baseline = namedtuple("Baseline", ["image", "target_visible"])
+
+
+class SettleDetector:
+    """Ends the wait after a click as soon as the UI has responded.
+
+    The window is captured right before the click and polled after it. The
+    wait is over when a target template is visible, or when the window has
+    changed from the pre-click capture and then stayed unchanged for
+    stable_time. A target that was already visible before the click, such
+    as a button shown on several tabs, only counts once the window has
+    changed. A click that changes nothing waits the full timeout, like
+    the fixed sleep it replaces.
+    """
+
+    def __init__(self, stable_time=STABLE_TIME, poll_interval=POLL_INTERVAL):
+        self.stable_time = stable_time
+        self.poll_interval = poll_interval
+
+    @staticmethod
+    def reduce(image):
+        """A small grayscale copy of a capture, for comparing with differs()"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(
+            gray, None, fx=DIFF_SCALE, fy=DIFF_SCALE, interpolation=cv2.INTER_AREA
+        )
+
+    @staticmethod
+    def differs(before, after):
+        """Whether two reduced captures show a visible change"""
+        if before.shape != after.shape:
+            return True
+        changed = cv2.absdiff(before, after) > PIXEL_THRESHOLD
+        return np.count_nonzero(changed) > CHANGED_FRACTION * changed.size
+
+    def capture(self, matcher, region, target=None):
+        """The pre-click Baseline of a region to compare against"""
+        frame = matcher.grab(region, record=False)
+        visible = (
+            target is not None
+            and matcher.locate(target, frame=frame, record=False) is not None
+        )
+        return Baseline(self.reduce(frame.image), visible)
+
+    def wait(self, matcher, region, baseline, timeout, sleep, target=None):
+        """Wait for the region to settle after a click, at most timeout seconds.
+
+        sleep is the workflow's cancellable sleep. Returns (seconds waited,
+        how the wait ended: "target", "stable" or "timeout").
+        """
+        started = time.monotonic()
+        previous = baseline.image
+        changed_at = None  # last time the region changed, once it has at all
+        while True:
+            elapsed = time.monotonic() - started
+            if elapsed >= timeout:
+                return elapsed, "timeout"
+            sleep(min(self.poll_interval, timeout - elapsed))
+
+            frame = matcher.grab(region, record=False)
+            now = time.monotonic()
+            current = self.reduce(frame.image)
+            changed = self.differs(previous, current)
+            if changed:
+                changed_at = now
+            previous = current
+
+            # A target already visible before the click only counts once the
+            # click has changed something
+            seen_before = baseline.target_visible and changed_at is None
+            if target is not None and not seen_before:
+                if matcher.locate(target, frame=frame, record=False):
+                    return now - started, "target"
+            if (
+                not changed
+                and changed_at is not None
+                and now - changed_at >= self.stable_time
+            ):
+                return now - started, "stable"
@@ -1,6 +1,4 @@
 from .workflow import Workflow
-import pyautogui
-import pywinctl as pwc
 
 
 class StartPrint(Workflow):
@@ -11,92 +9,74 @@ class StartPrint(Workflow):
         self.publish_control_message = publish_control_message
         self.use_software_start = use_software_start
 
-    def run(self, canvas_index=0):
+    def run(self, canvas_index=0, profile=None):
         super().run()
 
-        self.click_canvas_index(index=canvas_index)
+        # Phase durations are learned per canvas and job profile
+        phase = f"canvas_{canvas_index}/{profile or 'default'}"
 
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("print.png"), confidence=0.9
-        )
-        if not center:
-            return False
+        self.click_canvas_index(index=canvas_index, target="print.png")
 
-        pyautogui.click(self.transform_point_to_non_retina(center))
+        match = self.locate("print.png")
+        if not match:
+            return False
 
         # Give it a little while to start
-        pyautogui.sleep(2)
+        self.click(match.center, "print")
 
         # Wait for the printer to be ready
-        checks = 0
-        while True:
-            pyautogui.sleep(1)
-            self.logger.info("Waiting for printer to be ready...")
-            ready = pyautogui.locateOnScreen(
-                self.get_image_path("ready_to_start.png"), confidence=0.9
-            )
-            if ready:
-                break
-            checks += 1
-            if checks > 300:
-                return False
+        ready = self.wait_for(
+            "ready_to_start.png",
+            timeout=300,
+            phase=f"{phase}/ready_to_start",
+            message="Waiting for printer to be ready...",
+        )
+        if not ready:
+            return False
 
-        pyautogui.sleep(2)
+        self.sleep(2)
 
         if self.use_software_start:
-            center = pyautogui.locateCenterOnScreen(
-                self.get_image_path("start-printing.png"), confidence=0.9
-            )
-            if not center:
+            match = self.locate("start-printing.png")
+            if not match:
                 return False
 
-            pyautogui.click(self.transform_point_to_non_retina(center))
+            self.click(match.center, "start_printing")
         else:
             # Send MQTT message to press the physical start button
             self.publish_control_message("press_start_button")
-
-        pyautogui.sleep(2)
+            self.sleep(2)
 
         # Open the machine tab
-        self.click_machine()
+        self.click_machine(target="printing.png")
 
         # wait until
-        checks = 0
-        while True:
-            pyautogui.sleep(1)
-            self.logger.info("Waiting for printer to start printing..")
-            online = pyautogui.locateOnScreen(
-                self.get_image_path("printing.png"), confidence=0.9
-            )
-            if online:
-                break
-            checks += 1
-            if checks > 300:
-                return False
+        printing = self.wait_for(
+            "printing.png",
+            timeout=300,
+            phase=f"{phase}/printing",
+            message="Waiting for printer to start printing..",
+        )
+        if not printing:
+            return False
 
-        pyautogui.sleep(4)
+        self.sleep(4)
 
         # Loop until the print is complete
-        checks = 0
-        while True:
-            pyautogui.sleep(1)
-            self.logger.info("Waiting for printer to be finished...")
-            complete = pyautogui.locateOnScreen(
-                self.get_image_path("print_complete.png"), confidence=0.9
-            )
-            if complete:
-                break
-            checks += 1
-            if checks > 900:
-                return False
-
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("finish.png"), confidence=0.9
+        complete = self.wait_for(
+            "print_complete.png",
+            timeout=900,
+            phase=f"{phase}/print_complete",
+            message="Waiting for printer to be finished...",
         )
-        if not center:
+        if not complete:
+            return False
+
+        match = self.locate("finish.png")
+        if not match:
             return False
 
-        print(self.transform_point_to_non_retina(center))
-        pyautogui.click(self.transform_point_to_non_retina(center))
+        self.logger.info(f"Clicking finish at {match.center}")
+        self.click(match.center, "finish", wait=0)
 
         return True
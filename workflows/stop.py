@@ -1,6 +1,4 @@
 from .workflow import Workflow
-import pyautogui
-import pywinctl as pwc
 
 
 class Stop(Workflow):
@@ -11,52 +9,38 @@ class Stop(Workflow):
         super().run()
 
         # click the machine icon to reset the UI
-        self.click_machine()
+        self.click_machine(target="stop.png")
 
         # find the stop button
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("stop.png"), confidence=0.9
-        )
-        if not center:
+        match = self.locate("stop.png")
+        if not match:
             return False
 
-        pyautogui.click(self.transform_point_to_non_retina(center))
-
-        pyautogui.sleep(2)
+        self.click(match.center, "stop", target="confirm.png")
 
         # Find the confirm button
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("confirm.png"), confidence=0.9
-        )
-        if not center:
+        match = self.locate("confirm.png")
+        if not match:
             return False
 
-        pyautogui.click(self.transform_point_to_non_retina(center))
-
-        pyautogui.sleep(2)
+        self.click(match.center, "confirm")
 
         # wait until it is finished with printing
         checks = 0
         while True:
-            pyautogui.sleep(1)
-            if not pyautogui.locateOnScreen(
-                self.get_image_path("printing.png"), confidence=0.9
-            ):
+            self.sleep(1)
+            if not self.locate("printing.png"):
                 break
 
             checks += 1
             if checks > 10:
                 return False
 
-        pyautogui.sleep(2)
+        self.sleep(2)
 
         # When stopping mid print (not just mid scanning) there will be a final dialog.
-        center = pyautogui.locateCenterOnScreen(
-            self.get_image_path("stop-finish.png"), confidence=0.9
-        )
-        if center:
-            pyautogui.click(self.transform_point_to_non_retina(center))
-
-        pyautogui.sleep(2)
+        match = self.locate("stop-finish.png")
+        if match:
+            self.click(match.center, "stop_finish")
 
         return True
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+TEMPLATE_MANIFEST = "templates.json"
+BUNDLE_DATA = "templates.bin"
+BUNDLE_INDEX = "templates.index.json"
+PYRAMID_LEVELS = 2  # half and quarter size grayscale levels
+ALIGNMENT = 64  # every array starts on a cache line
+
+
+def source_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest(image_path):
+    try:
+        with open(os.path.join(image_path, TEMPLATE_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def template_names(image_path):
+    return sorted(name for name in os.listdir(image_path) if name.endswith(".png"))
+
+
+def master_sets(manifest):
+    """Extra master template sets as {subdirectory: UI scale they were captured at}"""
+    return {
+        subdir: spec.get("scale", 1.0)
+        for subdir, spec in manifest.get("master_sets", {}).items()
+    }
+
+
+def template_files(image_path):
+    """Every template source: the main set, then "<set>/<name>" per extra master set"""
+    files = template_names(image_path)
+    for subdir in sorted(master_sets(load_manifest(image_path))):
+        directory = os.path.join(image_path, subdir)
+        if os.path.isdir(directory):
+            files += [f"{subdir}/{name}" for name in template_names(directory)]
+    return files
+
+
+def build_bundle(image_path):
+    """Compile every template PNG into one raw array file plus a JSON index.
+
+    Per template the bundle holds the BGR image, its grayscale version,
+    PYRAMID_LEVELS downscaled grayscale levels and, if the PNG has
+    transparent pixels, a mask. The index records where each array lives,
+    the manifest metadata (scale, mode) and digests of the sources so a
+    stale bundle is detected. Templates of extra master sets are stored as
+    "<set>/<name>". Returns the number of templates.
+    """
+    index = {
+        "manifest": load_manifest(image_path),
+        "manifest_sha1": source_digest(os.path.join(image_path, TEMPLATE_MANIFEST)),
+        "templates": {},
+    }
+    offset = 0
+    chunks = []
+
+    def add(array):
+        nonlocal offset
+        array = np.ascontiguousarray(array, dtype=np.uint8)
+        padding = -offset % ALIGNMENT
+        chunks.append(b"\0" * padding)
+        offset += padding
+        entry = {"offset": offset, "shape": list(array.shape)}
+        chunks.append(array.tobytes())
+        offset += array.nbytes
+        return entry
+
+    names = template_files(image_path)
+    for name in names:
+        path = os.path.join(image_path, name)
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError(f"Cannot decode template: {path}")
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+        mask = None
+        if image.shape[2] == 4:
+            alpha = image[:, :, 3]
+            if alpha.min() < 255:
+                mask = np.where(alpha > 0, 255, 0).astype(np.uint8)
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        arrays = {"color": add(image), "grayscale": add(gray)}
+        for level in range(1, PYRAMID_LEVELS + 1):
+            # The same area resize the matcher applies, so a level matches
+            # exactly like a template scaled at runtime
+            factor = 0.5**level
+            arrays[f"pyramid_{level}"] = add(
+                cv2.resize(
+                    gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA
+                )
+            )
+        if mask is not None:
+            arrays["mask"] = add(mask)
+
+        index["templates"][name] = {"arrays": arrays, "sha1": source_digest(path)}
+
+    with open(os.path.join(image_path, BUNDLE_DATA), "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    with open(os.path.join(image_path, BUNDLE_INDEX), "w") as f:
+        json.dump(index, f, indent=2)
+    return len(names)
+
+
+class TemplateBundle:
+    """Read-only, memory-mapped view of a compiled template bundle.
+
+    The arrays are views into one file mapping, so loading costs no decoding
+    and processes on the same host share the pages through the OS cache.
+    """
+
+    def __init__(self, image_path, index):
+        self.index = index
+        self._data = np.memmap(
+            os.path.join(image_path, BUNDLE_DATA), dtype=np.uint8, mode="r"
+        )
+
+    @classmethod
+    def load(cls, image_path):
+        """The bundle in image_path, or None if missing or out of date"""
+        try:
+            with open(os.path.join(image_path, BUNDLE_INDEX)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Stale if a template or the manifest changed since the build
+        manifest = source_digest(os.path.join(image_path, TEMPLATE_MANIFEST))
+        if manifest != index.get("manifest_sha1"):
+            return None
+        templates = index.get("templates", {})
+        if sorted(templates) != sorted(template_files(image_path)):
+            return None
+        for name, entry in templates.items():
+            if source_digest(os.path.join(image_path, name)) != entry["sha1"]:
+                return None
+        try:
+            return cls(image_path, index)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def manifest(self):
+        """The templates.json contents the bundle was built with"""
+        return self.index["manifest"]
+
+    def array(self, name, kind="color"):
+        """A template array (color, grayscale, pyramid_N or mask), or None"""
+        entry = self.index["templates"].get(name)
+        if entry is None or kind not in entry["arrays"]:
+            return None
+        spec = entry["arrays"][kind]
+        return np.ndarray(
+            tuple(spec["shape"]), np.uint8, buffer=self._data, offset=spec["offset"]
+        )
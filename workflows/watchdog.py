@@ -0,0 +1,60 @@
+import time
+
+from .settle import SettleDetector
+
+STALL_TIME = 120.0  # seconds without any visible change before the app counts as hung
+
+
+class ApplicationHung(Exception):
+    """Raised from HangWatchdog.check once the app window has stopped changing"""
+
+
+class HangWatchdog:
+    """Declares the app hung once its window stops changing during a wait.
+
+    While the app works, something in its window moves on every few polls:
+    the print progress, the elapsed time, the printer status. A hung app
+    keeps showing the same frame, so the long waits would otherwise run
+    into their 300 or 900 second timeouts. check() compares each poll's
+    capture of the window with the previous one and raises ApplicationHung
+    once nothing has changed for stall_time.
+
+    stall_time has to be longer than any screen the app legitimately shows
+    without change.
+    """
+
+    def __init__(self, stall_time=STALL_TIME):
+        self.stall_time = stall_time
+        self.reset()
+
+    def reset(self):
+        """Start over, e.g. at the start of a wait"""
+        self._previous = None
+        self._changed_at = None
+
+    def check(self, frame, region, capture_scale):
+        """Compare a capture's window region with the previous poll's.
+
+        region is the window as (left, top, width, height) in click
+        coordinates. Returns the seconds the window has been unchanged.
+        """
+        left = max(0, int(region[0] * capture_scale) - frame.left)
+        top = max(0, int(region[1] * capture_scale) - frame.top)
+        right = int((region[0] + region[2]) * capture_scale) - frame.left
+        bottom = int((region[1] + region[3]) * capture_scale) - frame.top
+        window = frame.image[top:bottom, left:right]
+        now = time.monotonic()
+        if not window.size:
+            # The window is off screen; nothing to judge it by
+            self.reset()
+            return 0.0
+
+        current = SettleDetector.reduce(window)
+        if self._previous is None or SettleDetector.differs(self._previous, current):
+            self._changed_at = now
+        self._previous = current
+
+        unchanged = now - self._changed_at
+        if unchanged >= self.stall_time:
+            raise ApplicationHung(f"window unchanged for {unchanged:.0f}s")
+        return unchanged
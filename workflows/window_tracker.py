@@ -0,0 +1,116 @@
+import logging
+import os
+import signal
+import threading
+
+import pywinctl as pwc
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0  # seconds
+
+
+class WindowTracker:
+    """Keeps a handle on the target window and its current geometry.
+
+    The window is looked up by title once and the handle is reused until the
+    window goes away. A background thread polls the cached handle's geometry,
+    which is a single cheap call compared to enumerating every desktop window,
+    so `rect` stays current if the window is moved or resized mid-job.
+    """
+
+    def __init__(self, title, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.title = title
+        self.poll_interval = poll_interval
+        self._window = None
+        self._rect = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def window(self):
+        """The tracked window, looking it up if there is no live handle"""
+        with self._lock:
+            if self._window is not None and self._is_alive(self._window):
+                return self._window
+
+            windows = pwc.getWindowsWithTitle(
+                self.title, condition=pwc.Re.CONTAINS, flags=pwc.Re.IGNORECASE
+            )
+            self._window = windows[0] if windows else None
+            self._rect = self._window.rect if self._window else None
+            if self._window:
+                logger.info(f"Tracking window '{self._window.title}' at {self._rect}")
+            return self._window
+
+    @property
+    def rect(self):
+        """Last known window geometry"""
+        if self._rect is None:
+            self.refresh()
+        return self._rect
+
+    def refresh(self):
+        """Re-read the geometry of the tracked window; returns the rect or None"""
+        window = self.window
+        if window is None:
+            return None
+        try:
+            rect = window.rect
+        except Exception:
+            # The handle went stale between the liveness check and now
+            with self._lock:
+                self._window = self._rect = None
+            return None
+        if rect != self._rect:
+            logger.info(f"Window geometry changed: {self._rect} -> {rect}")
+            self._rect = rect
+        return rect
+
+    def activate(self):
+        """Bring the window to the front unless it already is; returns the rect or None"""
+        window = self.window
+        if window is None:
+            return None
+        if not window.isActive:
+            window.activate(wait=True)
+        return self.refresh()
+
+    def terminate(self):
+        """Terminate the process owning the window, e.g. once it has hung.
+
+        Returns whether there was a window to terminate.
+        """
+        window = self.window
+        if window is None:
+            return False
+        os.kill(window.getPID(), signal.SIGTERM)
+        with self._lock:
+            self._window = self._rect = None
+        return True
+
+    def start(self):
+        """Start polling the window geometry in the background"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._poll, name="window-tracker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            # Only follow an already resolved window; lookups happen on demand
+            if self._window is not None:
+                self.refresh()
+
+    @staticmethod
+    def _is_alive(window):
+        try:
+            return window.isAlive
+        except Exception:
+            return False
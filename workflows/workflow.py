@@ -1,5 +1,16 @@
+import logging
+import time
+
 import pyautogui
-import os
+
+from .layout import DEFAULT_ANCHORS
+from .phase_stats import DENSE_INTERVAL
+
+CLICK_WAIT = 2  # seconds to wait for the UI after a click
+
+
+class WorkflowCancelled(Exception):
+    """Raised from Workflow.sleep when the workflow's cancel event is set"""
 
 
 class Workflow:
@@ -7,48 +18,189 @@ class Workflow:
         self,
         name=None,
         window_rect=None,
-        is_retina=True,
-        image_path="images",
+        window_tracker=None,
+        matcher=None,
+        layout=None,
         logger=None,
+        cancel_event=None,
+        phase_stats=None,
+        settle=None,
+        watchdog=None,
     ):
         self.name = name
-        self.is_retina = is_retina
-        self.window_rect = window_rect
-        self.image_path = image_path
-        self.logger = logger
+        self._window_rect = window_rect
+        self.window_tracker = window_tracker
+        self.matcher = matcher
+        self.layout = layout
+        self.logger = logger or logging.getLogger(__name__)
+        self.cancel_event = cancel_event
+        self.phase_stats = phase_stats
+        self.settle = settle  # optional SettleDetector ending post-click waits early
+        self.watchdog = watchdog  # optional HangWatchdog ending waits on a frozen app
+        self.polls = 0  # screen captures taken by wait_for
+        # (label, seconds waited, fixed wait it replaced, how it ended) per click
+        self.click_waits = []
+
+    @property
+    def window_rect(self):
+        """Current window geometry, following moves and resizes if tracked"""
+        if self.window_tracker is not None:
+            return self.window_tracker.rect
+        return self._window_rect
+
+    def window_region(self):
+        """The window as a (left, top, width, height) capture region"""
+        rect = self.window_rect
+        return (rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
 
-    def get_image_path(self, image_name):
-        """Get the full path to an image based on retina setting"""
-        return os.path.join(self.image_path, image_name)
+    def locate(self, image_name, confidence=None):
+        """Find a template on screen; returns a Match in click coordinates or None.
 
-    def transform_point_to_non_retina(self, point):
-        if self.is_retina:
-            return (point.x / 2, point.y / 2)
-        return (point.x, point.y)
+        The confidence defaults to the template's tuned threshold.
+        """
+        return self.matcher.locate(image_name, confidence=confidence)
 
-    def click_at(self, x, y, sleep=True, relative_to_right_window_side=False):
+    def click(self, point, label, wait=CLICK_WAIT, target=None):
+        """Click a point in screen coordinates, then wait for the UI to respond.
+
+        Without a SettleDetector this sleeps `wait` seconds. With one, the
+        wait ends once the window has changed and settled, or once the
+        target template is visible, and `wait` is only the upper bound.
+        """
+        baseline = None
+        if wait and self.settle is not None:
+            baseline = self.settle.capture(self.matcher, self.window_region(), target)
+
+        pyautogui.click(*point)
+        if not wait:
+            return
+
+        if baseline is None:
+            self.sleep(wait)
+            waited, how = wait, "fixed"
+        else:
+            waited, how = self.settle.wait(
+                self.matcher, self.window_region(), baseline, wait, self.sleep, target
+            )
+        self.click_waits.append((label, waited, wait, how))
+
+    def click_at(
+        self,
+        x,
+        y,
+        sleep=True,
+        relative_to_right_window_side=False,
+        label=None,
+        target=None,
+    ):
         if relative_to_right_window_side:
-            pyautogui.click(self.window_rect.right - x, self.window_rect.top + y)
+            point = (self.window_rect.right - x, self.window_rect.top + y)
         else:
-            pyautogui.click(self.window_rect.left + x, self.window_rect.top + y)
-        if sleep:
-            pyautogui.sleep(2)
+            point = (self.window_rect.left + x, self.window_rect.top + y)
+        self.click(
+            point, label or f"{x},{y}", wait=CLICK_WAIT if sleep else 0, target=target
+        )
 
-    def click_home(self):
-        self.click_at(45, 45)
+    def sleep(self, seconds):
+        """Sleep, aborting early with WorkflowCancelled if the workflow is cancelled"""
+        if self.cancel_event is None:
+            pyautogui.sleep(seconds)
+        elif self.cancel_event.wait(seconds):
+            raise WorkflowCancelled(self.name)
 
-    def click_machine(self):
-        self.click_at(130, 45)
+    def wait_for(self, image_name, timeout, phase=None, message=None):
+        """Poll until a template is visible; returns its Match, or None on timeout.
 
-    def click_canvas_index(self, index=0, canvas_button_width=128):
-        offset = (
-            168  # from the left edge of the window until the first canvas tab begins
-        )
+        With a phase key and PhaseStats the polls are spaced out by the
+        phase's learned duration, and the duration is recorded on success.
+        Without one it polls every second. Polls slowed down by the
+        DetectionBudget still come at least every max_latency seconds.
+
+        With a HangWatchdog, ApplicationHung is raised once the window has
+        stopped changing, instead of waiting out the timeout.
+        """
+        started = time.monotonic()
+        if self.watchdog is not None:
+            self.watchdog.reset()
+        while True:
+            elapsed = time.monotonic() - started
+            if self.phase_stats is not None and phase is not None:
+                interval = self.phase_stats.next_interval(phase, elapsed)
+            else:
+                interval = DENSE_INTERVAL
+            if self.matcher.budget is not None:
+                # Poll less often while the service is over its CPU budget
+                interval *= self.matcher.budget.poll_factor
+            if self.phase_stats is not None:
+                # ...but never beyond the completion detection latency bound
+                interval = min(interval, self.phase_stats.max_latency)
+            self.sleep(interval)
+
+            if message:
+                self.logger.info(message)
+            self.polls += 1
+            frame = self.matcher.grab()
+            match = self.matcher.locate(image_name, frame=frame)
+            elapsed = time.monotonic() - started
+            if match:
+                if self.phase_stats is not None and phase is not None:
+                    self.phase_stats.record(phase, elapsed)
+                return match
+            if elapsed > timeout:
+                return None
+            if self.watchdog is not None:
+                self.watchdog.check(
+                    frame, self.window_region(), self.matcher.scale.capture
+                )
+
+    def locate_all(self, image_names, confidence=None):
+        """Find several templates in a single capture, evaluated concurrently"""
+        return self.matcher.locate_all(image_names, confidence=confidence)
+
+    def click_anchor(self, name, sleep=True, target=None):
+        """Click a named target from the calibrated layout map.
 
-        # click the canvas tab
-        self.click_at(
-            offset + (index * canvas_button_width) + (canvas_button_width / 2), 45
+        target is a template expected once the click has taken effect.
+        """
+        if self.layout is None:
+            x, y, side = DEFAULT_ANCHORS[name]
+            self.click_at(
+                x,
+                y,
+                sleep=sleep,
+                relative_to_right_window_side=side == "right",
+                label=name,
+                target=target,
+            )
+            return
+
+        self.click(
+            self.layout.point(name, self.window_rect),
+            name,
+            wait=CLICK_WAIT if sleep else 0,
+            target=target,
         )
 
+    def recalibrate_layout(self):
+        """Locate the layout anchors again after a verification match failed.
+
+        Returns whether that could have moved any anchor.
+        """
+        if self.layout is None:
+            return False
+        return self.layout.recalibrate(self.window_rect)
+
+    def click_home(self):
+        self.click_anchor("home")
+
+    def click_machine(self, sleep=True, target=None):
+        self.click_anchor("machine", sleep=sleep, target=target)
+
+    def click_canvas_index(self, index=0, target=None):
+        self.click_anchor(f"canvas_{index}", target=target)
+
     def run(self):
-        print(f"Running workflow: {self.name}")
+        self.logger.info(f"Running workflow: {self.name}")
+        if self.matcher is not None and self.matcher.ring is not None:
+            # Marks where each step starts in a failure dump
+            self.matcher.ring.record_event(f"workflow: {self.name}")